@@ -0,0 +1,210 @@
+"""Headless benchmarks of every dashboard tab's compute path.
+
+Times data loading, each tab's aggregation, chart-spec construction, a
+prediction and out-of-core streaming of the whole CSV on the bundled
+dataset and on synthetic copies scaled to more years, reporting wall time
+and peak Python memory. Exits with status 1 if
+any step exceeds its threshold.
+
+Thresholds are read from ``thresholds.json`` next to this file and can be
+overridden on the command line. Keys are a step name, optionally suffixed
+with ``@scale`` to apply to one scale only.
+
+Usage::
+
+    python benchmarks/bench_dashboard.py
+    python benchmarks/bench_dashboard.py --scales 1 10 100 --repeat 3 --json results.json
+    python benchmarks/bench_dashboard.py --threshold seasonal=0.01 --memory-threshold load@100=500
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import altair as alt
+import pandas as pd
+
+from weather import loader, models, results, stream
+from weather.aggregations import daily_month_averages, daily_temperatures_by_year
+from weather.cache import shared_cache
+from weather.charts import (monthly_average_chart, monthly_daily_chart, prediction_chart, regression_chart,
+                            seasonal_chart, yearly_chart)
+from weather.running import RunningAggregates
+
+# Rows per chunk of the streamed step, small enough to show its memory bound
+STREAM_CHUNK = 100000
+
+THRESHOLDS = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'thresholds.json')
+
+# Streamlit lifts Altair's row limit too
+alt.data_transformers.disable_max_rows()
+
+
+def scaled_csv(factor, directory, source=os.path.join(ROOT, loader.DATA_URL)):
+    """Write the bundled CSV repeated ``factor`` times, each copy shifted to earlier years."""
+    data = pd.read_csv(source)
+    span = data['Year'].max() - data['Year'].min() + 1
+    copies = [data.assign(Year=data['Year'] - span * copy) for copy in range(factor)]
+    path = os.path.join(directory, 'scaled_{}x.csv'.format(factor))
+    pd.concat(copies[::-1], ignore_index=True).to_csv(path, index=False)
+    return path
+
+
+def clear_caches():
+    for cached in (loader._load_aggregates, loader._read_manifest, loader._load_models):
+        cached.cache_clear()
+    shared_cache().clear()
+
+
+def steps(path):
+    """Benchmark steps in order, each a (name, callable) pair.
+
+    Later steps reuse what earlier ones produced, as the dashboard does.
+    """
+    state = {}
+
+    def load():
+        clear_caches()
+        loader.build_store(path)
+        state['data'] = loader.load_data(path)
+
+    def load_warm():
+        clear_caches()
+        state['data'] = loader.load_data(path)
+
+    def aggregates():
+        state['aggregates'] = RunningAggregates().update(state['data'])
+        state['years'] = state['aggregates'].complete_years()
+
+    def seasonal():
+        state['seasonal'] = state['aggregates'].seasonal_averages(state['years'])
+
+    def monthly():
+        state['monthly'] = state['aggregates'].daily_month_averages()
+        state['by_year'] = daily_temperatures_by_year(state['data'])
+
+    def monthly_groupby():
+        daily_month_averages(state['data'])
+
+    def yearly():
+        state['yearly'] = state['aggregates'].yearly_averages(state['years'])
+
+    def seasonal_spec():
+        seasonal_chart(state['seasonal']).to_dict()
+
+    def monthly_spec():
+        monthly_daily_chart(state['by_year'][state['years'][-1]]).to_dict()
+        monthly_average_chart(state['monthly']).to_dict()
+
+    def yearly_spec():
+        yearly_chart(state['yearly']).to_dict()
+
+    def cached_specs():
+        results.seasonal_spec(path)
+        results.monthly_average_spec(path)
+        results.yearly_spec(path)
+
+    def fit_models():
+        models.fit_models(state['aggregates'].moments)
+
+    def streamed():
+        stream.stream_aggregates(path, chunksize=STREAM_CHUNK)
+
+    def regression_index():
+        # The Prediction tab's path: stored model lines and the observed
+        # temperatures, with nothing cached from an earlier run
+        shared_cache().clear()
+        loader._load_models.cache_clear()
+        state['index'] = results.regression_index(path)
+
+    def prediction():
+        index = state['index']
+        first_year, last_year = int(index.years[0]), int(index.years[-1])
+        fit = index.lookup(7, 4)
+        regression_chart(index.observations(7, 4), fit, first_year, last_year).to_dict()
+        prediction_chart(fit, first_year, 2050).to_dict()
+
+    return [(step.__name__, step) for step in (load, load_warm, aggregates, seasonal, monthly, monthly_groupby, yearly,
+                                               seasonal_spec, monthly_spec, yearly_spec, cached_specs, fit_models,
+                                               regression_index, prediction, streamed)]
+
+
+def measure(step, repeat):
+    """Best wall time of ``repeat`` runs after an untimed one, and peak traced memory of one more."""
+    step()
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        step()
+        best = min(best, time.perf_counter() - start)
+    tracemalloc.start()
+    step()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return best, peak / 2 ** 20
+
+
+def threshold(limits, name, scale):
+    return limits.get('{}@{}'.format(name, scale), limits.get(name))
+
+
+def parse_limits(pairs):
+    limits = {}
+    for pair in pairs:
+        key, _, value = pair.partition('=')
+        limits[key] = float(value)
+    return limits
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark the dashboard compute paths.')
+    parser.add_argument('--scales', type=int, nargs='+', default=[1, 10, 100], help='dataset size multiples to run')
+    parser.add_argument('--repeat', type=int, default=3, help='timed runs per step, the best is reported')
+    parser.add_argument('--thresholds', default=THRESHOLDS, help='JSON file of time and memory thresholds')
+    parser.add_argument('--threshold', action='append', default=[], metavar='STEP[@SCALE]=SECONDS')
+    parser.add_argument('--memory-threshold', action='append', default=[], metavar='STEP[@SCALE]=MIB')
+    parser.add_argument('--json', help='also write the results to this file')
+    args = parser.parse_args(argv)
+
+    limits = {'seconds': {}, 'memory_mib': {}}
+    if os.path.exists(args.thresholds):
+        with open(args.thresholds) as f:
+            limits.update(json.load(f))
+    limits['seconds'].update(parse_limits(args.threshold))
+    limits['memory_mib'].update(parse_limits(args.memory_threshold))
+
+    results = []
+    failures = []
+    print('{:>5}  {:<16} {:>10} {:>10}'.format('scale', 'step', 'seconds', 'peak MiB'))
+    with tempfile.TemporaryDirectory() as directory:
+        for scale in args.scales:
+            path = scaled_csv(scale, directory)
+            for name, step in steps(path):
+                seconds, memory = measure(step, args.repeat)
+                results.append({'scale': scale, 'step': name, 'seconds': seconds, 'peak_mib': memory})
+                print('{:>5}  {:<16} {:>10.4f} {:>10.1f}'.format(scale, name, seconds, memory))
+
+                max_seconds = threshold(limits['seconds'], name, scale)
+                if max_seconds is not None and seconds > max_seconds:
+                    failures.append('{}@{} took {:.4f}s, threshold {}s'.format(name, scale, seconds, max_seconds))
+                max_memory = threshold(limits['memory_mib'], name, scale)
+                if max_memory is not None and memory > max_memory:
+                    failures.append('{}@{} peaked at {:.1f} MiB, threshold {} MiB'.format(name, scale, memory, max_memory))
+        clear_caches()
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=1)
+    for failure in failures:
+        print('FAIL', failure)
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,25 @@
+import os
+import shutil
+
+import pandas as pd
+
+from weather import aggregations, loader
+from weather.running import RunningAggregates
+
+DATA = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), loader.DATA_URL)
+
+
+def test_running_sums_give_the_grouped_tables(tmp_path):
+    path = str(tmp_path / 'temps.csv')
+    shutil.copy(DATA, path)
+    data = loader.load_data(path)
+    running = RunningAggregates().update(data)
+    # The running sums are float64; averaging the float32 column instead can
+    # round a table value the other way
+    data = data.astype({'avgtemperature': 'float64'})
+
+    years = aggregations.complete_years(data)
+    assert running.complete_years() == years
+    pd.testing.assert_frame_equal(running.seasonal_averages(years), aggregations.seasonal_averages(data, years))
+    pd.testing.assert_frame_equal(running.daily_month_averages(), aggregations.daily_month_averages(data))
+    pd.testing.assert_frame_equal(running.yearly_averages(years), aggregations.yearly_averages(data, years))
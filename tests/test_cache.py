@@ -0,0 +1,68 @@
+import threading
+
+import numpy as np
+
+from weather.cache import ResultCache
+
+
+def array(kib):
+    return np.zeros(kib * 1024, dtype='uint8')
+
+
+def test_least_recently_used_entries_are_evicted_by_size():
+    cache = ResultCache(max_bytes=3 * 1024)
+    for key in 'abc':
+        cache.get('scope', 1, key, lambda: array(1))
+    cache.get('scope', 1, 'a', lambda: None)  # a is now the most recently used
+    cache.get('scope', 1, 'd', lambda: array(1))
+
+    assert cache.bytes == 3 * 1024
+    assert not cache.contains('scope', 1, 'b')
+    assert all(cache.contains('scope', 1, key) for key in 'acd')
+
+    # An entry larger than the whole cache is returned but not kept
+    assert len(cache.get('scope', 1, 'big', lambda: array(4))) == 4 * 1024
+    assert not cache.contains('scope', 1, 'big')
+
+
+def test_a_new_version_drops_the_scope_older_entries():
+    cache = ResultCache()
+    cache.get('paris', 1, 'table', lambda: 'old')
+    cache.get('rome', 1, 'table', lambda: 'rome')
+
+    assert cache.get('paris', 2, 'table', lambda: 'new') == 'new'
+    assert not cache.contains('paris', 1, 'table')
+    assert cache.contains('rome', 1, 'table')
+    assert (cache.hits, cache.misses) == (0, 3)
+
+
+def test_concurrent_misses_compute_once():
+    cache = ResultCache()
+    started, release = threading.Event(), threading.Event()
+    calls = []
+
+    def compute():
+        calls.append(1)
+        started.set()
+        release.wait()
+        return 'value'
+
+    results = []
+    owner = threading.Thread(target=lambda: results.append(cache.get('scope', 1, 'key', compute)))
+    owner.start()
+    started.wait()
+
+    # Let the owner finish only once the second lookup waits for it
+    pending = cache._pending[('scope', 1, 'key')]
+    waiting, wait = threading.Event(), pending.wait
+    pending.wait = lambda *args: (waiting.set(), wait(*args))[1]
+    waiter = threading.Thread(target=lambda: results.append(cache.get('scope', 1, 'key', compute)))
+    waiter.start()
+    waiting.wait()
+    release.set()
+    owner.join()
+    waiter.join()
+
+    assert results == ['value', 'value']
+    assert len(calls) == 1
+    assert (cache.hits, cache.misses) == (1, 1)
@@ -0,0 +1,30 @@
+import numpy as np
+
+from weather import dates
+
+
+def test_validate_dates_gives_the_first_failing_reason():
+    years, months, days, reasons = dates.validate_dates(
+        ['2020', 2021, 'x', 2020, 2020, 2021, 2020, 2020, 2021, 1900, 2000, 1700, 2200],
+        ['July', 'feb', 1, 13, 6, 4, 4, 2, 2, 2, 2, 1, 1],
+        [4, 28, 1, 1, 0, 31, 30, 30, 29, 29, 29, 1, 1],
+        min_year=1800, max_year=2100)
+
+    assert list(reasons) == ['', '', dates.NOT_A_NUMBER, dates.NO_SUCH_MONTH, dates.NO_SUCH_DAY, dates.NO_31ST, '',
+                             dates.NO_30TH, dates.NOT_LEAP_YEAR, dates.NOT_LEAP_YEAR, '',
+                             dates.YEAR_OUT_OF_RANGE, dates.YEAR_OUT_OF_RANGE]
+    valid = reasons == ''
+    assert list(years[valid]) == [2020, 2021, 2020, 2000]
+    assert list(months[valid]) == [7, 2, 4, 2]
+    assert list(days[valid]) == [4, 28, 30, 29]
+    assert not years[~valid].any() and not months[~valid].any() and not days[~valid].any()
+
+
+def test_validate_dates_rejects_fractions_and_accepts_any_year_without_bounds():
+    reasons = dates.validate_dates([2020.5, 2020, 3000], [1, 1.5, 1], [1, 1, 1])[3]
+    assert list(reasons) == [dates.NOT_A_NUMBER, dates.NOT_A_NUMBER, '']
+
+
+def test_to_datetime64_of_validated_dates():
+    years, months, days, _ = dates.validate_dates([2020, 1999], ['February', 'dec'], [29, 31])
+    assert list(dates.to_datetime64(years, months, days)) == list(np.array(['2020-02-29', '1999-12-31'], dtype='datetime64[D]'))
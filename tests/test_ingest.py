@@ -0,0 +1,47 @@
+import pandas as pd
+
+from weather import loader
+from weather.dates import YEAR_OUT_OF_RANGE
+from weather.ingest import ingest
+
+HEADER = 'Region,Country,State,City,Month,Day,Year,AvgTemperature\n'
+
+
+def rows(*dates):
+    return pd.DataFrame([['North America', 'US', 'Indiana', 'Indianapolis', str(month), str(day), str(year), '50.0']
+                         for month, day, year in dates], columns=HEADER.strip().split(','))
+
+
+def test_reingesting_the_same_rows_appends_nothing(tmp_path, monkeypatch):
+    # Rejections are logged to invalidentries.log in the working directory
+    monkeypatch.chdir(tmp_path)
+    path = str(tmp_path / 'temps.csv')
+    with open(path, 'w') as f:
+        f.write(HEADER + 'North America,US,Indiana,Indianapolis,5,13,2020,60.0\n')
+    new = rows((5, 14, 2020), (5, 15, 2020))
+
+    assert ingest(new, path)[0] == 2
+    appended, rejected = ingest(new, path)
+    assert appended == 0
+    assert list(rejected['reason']) == ['date already stored'] * 2
+
+    assert ingest(rows((5, 13, 2020)), path)[0] == 0
+    assert len(loader.load_data(path)) == 3
+    assert len(pd.read_csv(path)) == 3
+
+
+def test_years_out_of_range_are_rejected_and_dropped(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    path = str(tmp_path / 'temps.csv')
+    with open(path, 'w') as f:
+        f.write(HEADER + 'North America,US,Indiana,Indianapolis,5,13,2020,60.0\n'
+                + 'North America,US,Indiana,Indianapolis,5,13,200,60.0\n'
+                + 'North America,US,Indiana,Indianapolis,5,13,40000,60.0\n')
+
+    appended, rejected = ingest(rows((5, 14, 2020), (5, 14, 40000), (5, 14, 1)), path)
+    assert appended == 1
+    assert list(rejected['reason']) == [YEAR_OUT_OF_RANGE] * 2
+
+    data = loader.load_data(path)
+    assert sorted(data['year'].unique()) == [2020]
+    assert loader.open_store(path)['cities']['Indianapolis, Indiana']['first_year'] == 2020
@@ -0,0 +1,45 @@
+import os
+import shutil
+
+import numpy as np
+import pandas as pd
+
+from weather import loader, results, stream
+from weather.models import MODELS
+
+DATA = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), loader.DATA_URL)
+
+CITY = 'Indianapolis, Indiana'
+
+
+def archive(tmp_path):
+    # The bundled city and a copy of it under another name, so streaming has to split cities
+    data = pd.read_csv(DATA)
+    other = data.assign(City='Springfield', State='Illinois', AvgTemperature=data['AvgTemperature'] + 1)
+    path = str(tmp_path / 'temps.csv')
+    pd.concat([data, other]).to_csv(path, index=False)
+    return path
+
+
+def test_streamed_tables_match_the_dashboard(tmp_path):
+    path = archive(tmp_path)
+    running = stream.stream_aggregates(path, CITY, chunksize=1000)
+
+    pd.testing.assert_frame_equal(stream.table(running, 'seasonal'), results.seasonal_averages(path, CITY))
+    pd.testing.assert_frame_equal(stream.table(running, 'monthly'), results.daily_month_averages(path, CITY))
+    pd.testing.assert_frame_equal(stream.table(running, 'yearly'), results.yearly_averages(path, CITY))
+    for model in MODELS:
+        index = results.regression_index(path, CITY, model)
+        lines = stream.lines_table(running, model)
+        np.testing.assert_allclose(lines['slope'], index.slope)
+        np.testing.assert_allclose(lines['intercept'], index.intercept)
+        np.testing.assert_array_equal(lines['count'], index.count)
+
+
+def test_streamed_cities_are_aggregated_separately(tmp_path):
+    path = archive(tmp_path)
+    aggregates = stream.stream_city_aggregates(path, chunksize=1000)
+
+    assert sorted(aggregates) == [CITY, 'Springfield, Illinois']
+    for city, running in aggregates.items():
+        pd.testing.assert_frame_equal(stream.table(running, 'yearly'), results.yearly_averages(path, city))
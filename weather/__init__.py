@@ -0,0 +1,28 @@
+"""Data and compute layer for the Indianapolis weather dashboard.
+
+Importing the package or any of its modules does no work: the dataset,
+regression index, database connection and log file are all created on
+first use, so the Streamlit app, batch jobs and benchmarks can import
+only what they need.
+
+Modules:
+
+- ``loader``: typed, memoized loading of one city's data
+- ``storage``: per-city partitioned Parquet storage
+- ``aggregations``: seasonal, monthly and yearly average tables
+- ``running``: the same tables and regression lines kept as running sums
+- ``models``: forecasting models fitted from the running sums
+- ``regression``: per calendar day regression index
+- ``charts``: Altair charts built from server-side slices of the data
+- ``cache``: process-wide LRU cache of results, with an optional disk tier
+- ``results``: tab tables and predictions shared by every session
+- ``warmup``: background precomputation of every tab
+- ``predict``: batch predictions for ranges or files of dates
+- ``ingest``: appending new daily observations
+- ``stream``: out-of-core aggregation of archives of any size
+- ``dates``: vectorized calendar validation of arrays of dates
+- ``users``: user accounts in the SQLite database
+- ``session``: login state of a Streamlit session
+- ``logs``: queued, non-blocking log files
+- ``instrument``: timing spans exported as JSON lines
+"""
@@ -0,0 +1,107 @@
+"""Grouped aggregations behind the Seasonal, Monthly and Yearly tabs.
+
+Each ``*_averages`` function makes a single grouped pass over ``data`` and
+returns the long-form DataFrame the matching Altair chart consumes. The
+``*_table`` functions do the reshaping, so averages kept as running sums
+(see :mod:`weather.running`) produce identical frames.
+"""
+import pandas as pd
+
+MONTHS = ['January', 'February', 'March', 'April', 'May', 'June', 'July', 'August', 'September', 'October', 'November', 'December']
+GET_SEASONS = ['winter', 'spring', 'summer', 'fall']
+
+# USING METEOROLOGICAL SEASONS
+SEASON_RANGES = {
+    'Winter': 'December 1 - February 28/29',
+    'Spring': 'March 1 - May 31',
+    'Summer': 'June 1 - August 31',
+    'Fall': 'September 1 - November 30',
+}
+
+TEMPERATURE = 'Temperature (°F)'
+
+
+def _years(data, years):
+    # Default to every year present in the data
+    if years is None:
+        return sorted(data['year'].unique())
+    return list(years)
+
+
+def complete_years(data):
+    """Years with observations in all twelve months."""
+    months = data.groupby('year')['month'].nunique()
+    return [int(year) for year in months.index[months == 12]]
+
+
+def seasonal_table(means, years):
+    """Long-form seasonal table from a year x season frame of averages.
+
+    Returns columns ``Year``, ``Seasons``, ``Temperature (°F)`` and ``Range``.
+    """
+    means = means.reindex(index=years, columns=GET_SEASONS)
+    means.columns = [season.capitalize() for season in GET_SEASONS]
+    means.index.name = 'Year'
+
+    # Change dataframe to long form data
+    # Add column for date range of each season
+    seasonal = means.reset_index().melt('Year', value_name=TEMPERATURE, var_name='Seasons')
+    seasonal['Year'] = seasonal['Year'].astype(int)
+    seasonal[TEMPERATURE] = seasonal[TEMPERATURE].astype(float).round(decimals=2)
+    seasonal['Range'] = seasonal['Seasons'].map(SEASON_RANGES)
+    return seasonal
+
+
+def seasonal_averages(data, years=None):
+    """Average temperature for each season of each year."""
+    means = data.groupby(['year', 'season'], observed=True)['avgtemperature'].mean().unstack()
+    return seasonal_table(means, _years(data, years))
+
+
+def daily_month_table(means):
+    """Long-form table from a day x month frame of averages.
+
+    Days a month does not have are left as NaN. Returns columns ``Days``,
+    ``Months`` and ``Temperature (°F)``.
+    """
+    means = means.reindex(index=range(1, 32), columns=range(1, 13))
+    means.columns = MONTHS
+    means.index = [str(day) for day in means.index]
+    means.index.name = 'Days'
+
+    # Change dataframe to long form data
+    monthly = means.reset_index().melt('Days', value_name=TEMPERATURE, var_name='Months')
+    monthly[TEMPERATURE] = monthly[TEMPERATURE].astype(float).round(decimals=1)
+    return monthly
+
+
+def daily_month_averages(data):
+    """Average temperature for each day of each month across all years."""
+    return daily_month_table(data.groupby(['day', 'month'])['avgtemperature'].mean().unstack())
+
+
+def yearly_table(means, years):
+    """Yearly table from a Series of averages indexed by year.
+
+    Returns columns ``Years`` (as strings) and ``Temperature (°F)``.
+    """
+    means = means.reindex(years)
+    return pd.DataFrame({'Years': [str(year) for year in years], TEMPERATURE: means.to_numpy(dtype=float)})
+
+
+def yearly_averages(data, years=None):
+    """Average temperature for each year."""
+    return yearly_table(data.groupby('year')['avgtemperature'].mean(), _years(data, years))
+
+
+def daily_temperatures_by_year(data):
+    """Daily temperatures split into one frame per year.
+
+    Each frame has columns ``day``, ``name`` (month name) and
+    ``avgtemperature``, so a chart only needs the rows of the year shown.
+    """
+    frame = data[['year', 'month', 'day', 'avgtemperature']]
+    names = pd.Categorical.from_codes(frame['month'].to_numpy() - 1, MONTHS)
+    frame = frame.assign(name=names)
+    return {int(year): group[['day', 'name', 'avgtemperature']].reset_index(drop=True)
+            for year, group in frame.groupby('year')}
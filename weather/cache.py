@@ -0,0 +1,189 @@
+"""Process-wide cache of computed results, shared by every session.
+
+Streamlit runs every session's script in the same process, so a table
+computed for one user can be served to all of them. Entries are grouped
+by scope (e.g. a dataset and city) and tagged with the scope's version;
+the first lookup with a newer version drops the scope's older entries.
+
+The memory tier evicts least recently used entries once their estimated
+size exceeds ``max_bytes``. With a ``directory`` each entry is also
+pickled to disk, so results survive a restart of the app.
+
+Concurrent lookups of the same missing key wait for a single computation
+instead of each computing it.
+"""
+import collections
+import functools
+import glob
+import hashlib
+import os
+import pickle
+import sys
+import threading
+
+import numpy as np
+import pandas as pd
+
+MAX_BYTES = 256 * 1024 * 1024
+
+# Directory of the disk tier, or None to keep results in memory only
+CACHE_DIR = None
+
+
+def _digest(value):
+    return hashlib.sha1(repr(value).encode()).hexdigest()[:16]
+
+
+def sizeof(value):
+    """Rough size in bytes of a cached value."""
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(deep=True).sum())
+    if isinstance(value, pd.Series):
+        return int(value.memory_usage(deep=True))
+    if isinstance(value, np.ndarray):
+        return value.nbytes
+    if isinstance(value, (tuple, list)):
+        return sys.getsizeof(value) + sum(sizeof(item) for item in value)
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(sizeof(item) for item in value.values())
+    if hasattr(value, '__dict__'):
+        return sys.getsizeof(value) + sizeof(vars(value))
+    return sys.getsizeof(value)
+
+
+class ResultCache:
+    """LRU cache of results keyed on ``(scope, version, key)``."""
+
+    def __init__(self, max_bytes=MAX_BYTES, directory=None):
+        self.max_bytes = max_bytes
+        self.directory = directory
+        self.hits = self.misses = 0
+        self._entries = collections.OrderedDict()
+        self._sizes = {}
+        self._bytes = 0
+        self._versions = {}
+        self._pending = {}
+        self._lock = threading.Lock()
+        if directory is not None:
+            os.makedirs(directory, exist_ok=True)
+
+    def __len__(self):
+        return len(self._entries)
+
+    @property
+    def bytes(self):
+        return self._bytes
+
+    def _file(self, scope, version, key):
+        # Scope and version prefixes let _invalidate() find stale files by name
+        return os.path.join(self.directory, '{}-{}-{}.pkl'.format(_digest(scope), _digest(version), _digest(key)))
+
+    def _invalidate(self, scope, version):
+        # Called with the lock held
+        if self._versions.get(scope) == version:
+            return
+        self._versions[scope] = version
+        for entry in [entry for entry in self._entries if entry[0] == scope and entry[1] != version]:
+            self._drop(entry)
+        if self.directory is not None:
+            current = '{}-{}-'.format(_digest(scope), _digest(version))
+            for file in glob.glob(os.path.join(self.directory, '{}-*.pkl'.format(_digest(scope)))):
+                if not os.path.basename(file).startswith(current):
+                    try:
+                        os.remove(file)
+                    except FileNotFoundError:
+                        pass
+
+    def _drop(self, entry):
+        del self._entries[entry]
+        self._bytes -= self._sizes.pop(entry)
+
+    def _store(self, entry, value):
+        # Called with the lock held
+        if entry in self._entries:
+            self._drop(entry)
+        size = sizeof(value)
+        if size > self.max_bytes:
+            return
+        self._entries[entry] = value
+        self._sizes[entry] = size
+        self._bytes += size
+        while self._bytes > self.max_bytes:
+            self._drop(next(iter(self._entries)))
+
+    def _read(self, entry):
+        try:
+            with open(self._file(*entry), 'rb') as f:
+                return pickle.load(f)
+        except (FileNotFoundError, EOFError, pickle.UnpicklingError):
+            return None
+
+    def _write(self, entry, value):
+        # Write under a temporary name so readers never see a partial file
+        path = self._file(*entry)
+        tmp = '{}.{}.{}.tmp'.format(path, os.getpid(), threading.get_ident())
+        with open(tmp, 'wb') as f:
+            pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, path)
+
+    def contains(self, scope, version, key):
+        """Whether ``key`` at ``version`` of ``scope`` is cached in memory."""
+        with self._lock:
+            return (scope, version, key) in self._entries
+
+    def get(self, scope, version, key, compute):
+        """Cached result of ``compute()`` for ``key`` at ``version`` of ``scope``.
+
+        The returned value is shared between callers and must not be modified.
+        """
+        entry = (scope, version, key)
+        with self._lock:
+            self._invalidate(scope, version)
+            if entry in self._entries:
+                self._entries.move_to_end(entry)
+                self.hits += 1
+                return self._entries[entry]
+            pending = self._pending.get(entry)
+            owner = pending is None
+            if owner:
+                pending = self._pending[entry] = threading.Event()
+
+        if not owner:
+            # Another thread is computing this entry; use its result
+            pending.wait()
+            with self._lock:
+                if entry in self._entries:
+                    self.hits += 1
+                    return self._entries[entry]
+            return self.get(scope, version, key, compute)
+
+        try:
+            value = self._read(entry) if self.directory is not None else None
+            if value is None:
+                value = compute()
+                if self.directory is not None:
+                    self._write(entry, value)
+            with self._lock:
+                self.misses += 1
+                if self._versions.get(scope) == version:
+                    self._store(entry, value)
+            return value
+        finally:
+            with self._lock:
+                del self._pending[entry]
+            pending.set()
+
+    def clear(self):
+        """Drop every entry from memory; files on disk are kept."""
+        with self._lock:
+            self._entries.clear()
+            self._sizes.clear()
+            self._versions.clear()
+            self._bytes = 0
+            self.hits = self.misses = 0
+
+
+@functools.lru_cache(maxsize=None)
+def shared_cache():
+    """The process-wide :class:`ResultCache`, created on first use."""
+    return ResultCache(MAX_BYTES, CACHE_DIR)
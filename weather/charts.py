@@ -0,0 +1,130 @@
+"""Altair charts for every dashboard tab.
+
+Building the charts here rather than in the Streamlit script lets batch
+jobs and benchmarks construct and serialize them without a browser.
+"""
+import altair as alt
+import numpy as np
+import pandas as pd
+
+from weather.aggregations import MONTHS, TEMPERATURE
+
+COLOR = ['#fa4115', '#bb2852', '#1aa6c2', '#49eb6e', '#0a4dca', '#fbb6c0', '#3ca900', '#b7a1f4', '#3fcdf9', '#c59121', '#171ba2', '#870a11']
+
+
+def temperature_domain(values, step, zero=False):
+    """Axis domain covering ``values``, widened to multiples of ``step``.
+
+    Fixing the domain keeps the axis still while a year slider filters the data.
+    Without any values the domain is ``(0, step)``.
+    """
+    values = np.asarray(values, dtype=float)
+    values = values[~np.isnan(values)]
+    if not values.size:
+        return (0, step)
+    low = np.floor(values.min() / step) * step
+    high = np.ceil(values.max() / step) * step
+    return (min(low, 0) if zero else low, high)
+
+
+def chart_spec(chart):
+    """Vega-Lite spec of ``chart`` as a dict, with its data embedded under ``datasets``.
+
+    The spec can be cached and rendered with ``st.vega_lite_chart`` without
+    building or validating the Altair chart again.
+    """
+    with alt.data_transformers.enable('default', max_rows=None):
+        return chart.to_dict()
+
+
+def monthly_daily_chart(year_data):
+    """Line chart of one year's daily temperatures, one line per month.
+
+    The three layers share a single copy of ``year_data`` in the spec.
+    """
+    # Create selection for tooltip hover
+    selection = alt.selection_single(fields=['day'], nearest=True, on='mouseover', empty='none', clear='mouseout')
+    x = alt.X('day:O', sort=None, title='Day')
+    y = alt.Y('avgtemperature', title='Temperature (°F)')
+    color = alt.Color('name', scale=alt.Scale(domain=MONTHS, range=COLOR), title='Month')
+
+    # Create chart for month line
+    # Create chart for temperature data points
+    # Create chart to display tooltip on vertical line
+    line = alt.Chart().mark_line().encode(x=x, y=y, color=color)
+    point = alt.Chart().mark_circle().encode(x=x, y=y, color=color, tooltip=[alt.Tooltip('avgtemperature', title='Farenheit')])
+    rule = alt.Chart().transform_pivot('name', value='avgtemperature', groupby=['day']).mark_rule(color='steelblue').encode(
+        x=x, opacity=alt.condition(selection, alt.value(1), alt.value(0)),
+        tooltip=[alt.Tooltip(c, type='quantitative') for c in MONTHS]).add_selection(selection)
+
+    return alt.layer(line, point, rule, data=year_data).interactive()
+
+
+def seasonal_chart(table):
+    """Bar chart of the seasonal table with a slider to pick the year.
+
+    An empty table gives an empty chart.
+    """
+    first_year, last_year = (int(table['Year'].min()), int(table['Year'].max())) if len(table) else (0, 0)
+
+    # Create slider to display data by year
+    slider = alt.binding_range(min=first_year, max=last_year, step=1, name='Year')
+    select_year = alt.selection_single(name='Year', fields=['Year'], bind=slider, init={'Year': last_year})
+
+    return alt.Chart(table).mark_bar().encode(
+        x=alt.X('Seasons', sort=None), y=alt.Y(TEMPERATURE, scale=alt.Scale(domain=temperature_domain(table[TEMPERATURE], 10, zero=True))),
+        color='Seasons', tooltip=[alt.Tooltip(TEMPERATURE, title='Farenheit'), alt.Tooltip('Range', title='Date Range')]
+    ).add_selection(select_year).transform_filter(select_year).interactive()
+
+
+def monthly_average_chart(table):
+    """Line chart of the day x month average table, one line per month."""
+    # Create selection for tooltip hover
+    selection = alt.selection_single(fields=['Days'], nearest=True, on='mouseover', empty='none', clear='mouseout')
+
+    # Create chart for month line
+    # Create chart to display tooltip on vertical line
+    line = alt.Chart(table).mark_line().encode(
+        x=alt.X('Days', sort=None), y=alt.Y(TEMPERATURE, scale=alt.Scale(domain=temperature_domain(table[TEMPERATURE], 10))),
+        color=alt.Color('Months', scale=alt.Scale(domain=MONTHS, range=COLOR)))
+    rule = alt.Chart(table).transform_pivot('Months', value=TEMPERATURE, groupby=['Days']).mark_rule(color='steelblue').encode(
+        x=alt.X('Days', sort=None, title='Days'), opacity=alt.condition(selection, alt.value(1), alt.value(0)),
+        tooltip=[alt.Tooltip(c, type='quantitative') for c in MONTHS]).add_selection(selection)
+    return (line + rule).interactive()
+
+
+def yearly_chart(table):
+    """Bubble chart of yearly averages with a regression trend line."""
+    bubble = alt.Chart(table).mark_point(color='red').encode(
+        x=alt.X('Years', sort=None), y=alt.Y(TEMPERATURE, scale=alt.Scale(domain=temperature_domain(table[TEMPERATURE], 1))))
+    trend = bubble.transform_regression('Years', TEMPERATURE).mark_line(color='orange').encode()
+    return (bubble + trend).interactive()
+
+
+def regression_chart(observations, fit, first_year, last_year):
+    """Observed temperatures of one calendar day with its fitted line."""
+    # Create selection for tooltip hover
+    selection = alt.selection_single(fields=['Year'], nearest=True, on='mouseover', empty='none', clear='mouseout')
+    domain = alt.Scale(domain=(first_year, last_year))
+
+    # Create dataframe for regression line
+    line_df = pd.DataFrame({'Years': [first_year, last_year],
+                            'Temperature': [fit.slope * first_year + fit.intercept, fit.slope * last_year + fit.intercept]})
+
+    # Create chart for regression line
+    # Create chart for data points
+    # Create chart for vertical tooltip
+    line = alt.Chart(line_df).mark_line(color='red').encode(x=alt.X('Years', sort=None, scale=domain), y=alt.Y('Temperature'))
+    points = alt.Chart(observations).mark_point().encode(x=alt.X('Year', sort=None, scale=domain), y=alt.Y('avgtemperature', title='Temperature'))
+    rule = alt.Chart(observations).mark_rule(color='steelblue').encode(
+        x=alt.X('Year', sort=None, scale=domain), opacity=alt.condition(selection, alt.value(1), alt.value(0)),
+        tooltip=alt.Tooltip('avgtemperature')).add_selection(selection)
+    return (points + line + rule).properties(width=600).interactive()
+
+
+def prediction_chart(fit, first_year, year):
+    """Fitted line of one calendar day extended to the predicted year."""
+    line_df = pd.DataFrame({'Years': [first_year, year],
+                            'Temperature': [fit.slope * first_year + fit.intercept, fit.slope * year + fit.intercept]})
+    return alt.Chart(line_df).mark_line(color='red').encode(
+        x=alt.X('Years', sort=None, scale=alt.Scale(domain=(first_year, year))), y=alt.Y('Temperature')).properties(width=1250)
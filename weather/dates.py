@@ -0,0 +1,117 @@
+"""Calendar helpers for validating dates.
+
+:func:`validate_dates` checks whole arrays of (year, month, day) at once,
+so the Prediction tab, batch predictions and ingestion share one set of
+rules and reasons.
+"""
+import numpy as np
+import pandas as pd
+
+from weather.aggregations import MONTHS
+from weather.logs import get_file_logger
+
+# Longest each month can be, February counted with its leap day
+DAYS_IN_MONTH = [31, 29, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31]
+
+# Longest length of each month by month number, 0 for month 0
+MONTH_LENGTH = np.array([0] + DAYS_IN_MONTH, dtype='int8')
+
+# Month number of each lowercase month name and three letter abbreviation
+MONTH_NUMBER = {name.lower(): number for number, name in enumerate(MONTHS, 1)}
+MONTH_NUMBER.update({name.lower()[:3]: number for number, name in enumerate(MONTHS, 1)})
+
+# Every (month, day) key in calendar order, February 29 included
+KEYS = [(month + 1, day + 1) for month in range(12) for day in range(DAYS_IN_MONTH[month])]
+
+# Position of each (month, day) in KEYS, -1 where the date does not exist
+POSITION = np.full((13, 32), -1, dtype='int16')
+for _row, (_month, _day) in enumerate(KEYS):
+    POSITION[_month, _day] = _row
+
+NOT_A_NUMBER = 'month, day or year is not a number'
+YEAR_OUT_OF_RANGE = 'year out of range'
+NO_SUCH_MONTH = 'month does not exist'
+NO_SUCH_DAY = 'day does not exist'
+NO_31ST = 'month does not have 31 days'
+NO_30TH = 'February does not have more than 29 days'
+NOT_LEAP_YEAR = 'not a leap year'
+
+
+def is_leap_year(year):
+    """Gregorian leap year rule, for a year or an array of years."""
+    return (year % 4 == 0) & ((year % 100 != 0) | (year % 400 == 0))
+
+
+def month_number(name):
+    """Month number (1-12) of a month name such as ``'January'`` or ``'jan'``."""
+    return MONTH_NUMBER[name.strip().lower()]
+
+
+def _numbers(values):
+    return pd.to_numeric(pd.Series(np.asarray(values, dtype=object).ravel()), errors='coerce').to_numpy(dtype=float)
+
+
+def month_numbers(months):
+    """Month numbers of an array of month numbers or names, NaN where neither."""
+    months = pd.Series(np.asarray(months, dtype=object).ravel())
+    names = months.astype(str).str.strip().str.lower().map(MONTH_NUMBER)
+    return names.fillna(pd.Series(_numbers(months))).to_numpy(dtype=float)
+
+
+def validate_dates(years, months, days, min_year=None, max_year=None):
+    """Validate arrays of dates in one pass.
+
+    ``months`` may hold month numbers or names; numbers may be given as
+    strings. Returns the years, months and days as int64 arrays (0 where
+    the date is invalid) and an array of reasons, ``''`` where the date is
+    valid. The first failing check gives the reason.
+    """
+    year = _numbers(years)
+    month = month_numbers(months)
+    day = _numbers(days)
+
+    whole = np.isfinite(year) & np.isfinite(month) & np.isfinite(day)
+    whole &= (year == np.floor(year)) & (month == np.floor(month)) & (day == np.floor(day))
+    known_month = whole & (month >= 1) & (month <= 12)
+    length = MONTH_LENGTH[np.where(known_month, month, 0).astype('int64')]
+    february = month == 2
+
+    checks = [
+        (~whole, NOT_A_NUMBER),
+        ((year < min_year) if min_year is not None else np.zeros(len(year), bool), YEAR_OUT_OF_RANGE),
+        ((year > max_year) if max_year is not None else np.zeros(len(year), bool), YEAR_OUT_OF_RANGE),
+        (~known_month, NO_SUCH_MONTH),
+        ((day < 1) | (day > 31), NO_SUCH_DAY),
+        (february & (day > 29), NO_30TH),
+        (day > length, NO_31ST),
+        (february & (day == 29) & ~is_leap_year(np.where(whole, year, 1)), NOT_LEAP_YEAR),
+    ]
+    reasons = np.select([failed for failed, _ in checks], [reason for _, reason in checks], default='')
+
+    valid = reasons == ''
+    return (np.where(valid, year, 0).astype('int64'), np.where(valid, month, 0).astype('int64'),
+            np.where(valid, day, 0).astype('int64'), reasons)
+
+
+def to_datetime64(years, months, days):
+    """``datetime64[D]`` array of already validated year, month and day arrays."""
+    first = (np.asarray(years, dtype='int64') - 1970).astype('datetime64[Y]').astype('datetime64[M]')
+    first = first + (np.asarray(months, dtype='int64') - 1).astype('timedelta64[M]')
+    return first.astype('datetime64[D]') + (np.asarray(days, dtype='int64') - 1).astype('timedelta64[D]')
+
+
+def log_invalid(labels, reasons, what='date'):
+    """Log the invalid entries of a batch to ``invalidentries.log``.
+
+    ``labels`` describes each entry, ``reasons`` is as returned by
+    :func:`validate_dates`. Writes one line per reason listing every entry
+    that failed with it.
+    """
+    invalid = pd.DataFrame({'label': np.asarray(labels, dtype=object), 'reason': reasons})
+    invalid = invalid[invalid['reason'] != '']
+    if len(invalid):
+        file_logger = get_file_logger()
+        for reason, group in invalid.groupby('reason', sort=False)['label']:
+            file_logger.info('Rejected {} {}{}, {}: {}'.format(
+                len(group), what, 's' if len(group) > 1 else '', reason, ', '.join(map(str, group))))
+    return len(invalid)
@@ -0,0 +1,93 @@
+"""Append new daily observations to the stored dataset.
+
+New rows are validated, appended to their cities' partitions and the CSV,
+and folded into the running aggregates (see :mod:`weather.running`), so a
+daily update costs O(new rows) rather than a rebuild. Dates a city already
+has are rejected, so ingesting the same file twice appends nothing. Rejected rows are
+logged to ``invalidentries.log`` with the reason.
+
+Usage::
+
+    python -m weather.ingest new_rows.csv
+"""
+import argparse
+import sys
+
+import numpy as np
+import pandas as pd
+
+from weather.dates import log_invalid, validate_dates
+from weather.loader import DATA_URL, DTYPES, FIRST_YEAR, MISSING_TEMPERATURE, append_rows, last_year, stored_rows
+
+# Columns of the CSV, in file order
+COLUMNS = list(DTYPES)
+
+# Plausible daily average temperatures in °F
+TEMPERATURE_RANGE = (-90, 140)
+
+
+def validate(rows):
+    """Split raw rows into accepted and rejected ones.
+
+    ``rows`` has the CSV's columns. Returns the accepted rows with the
+    loader's lowercase columns and dtypes, and the rejected rows with an
+    extra ``reason`` column.
+    """
+    missing = [column for column in COLUMNS if column not in rows.columns]
+    if missing:
+        raise ValueError('missing columns: {}'.format(', '.join(missing)))
+    rows = rows[COLUMNS].reset_index(drop=True)
+
+    year, month, day, date_reason = validate_dates(rows['Year'], rows['Month'], rows['Day'], FIRST_YEAR, last_year())
+    temperature = pd.to_numeric(rows['AvgTemperature'], errors='coerce').to_numpy(dtype=float)
+    duplicate = rows.assign(Month=month, Day=day, Year=year).duplicated(['Region', 'Country', 'State', 'City', 'Month', 'Day', 'Year']).to_numpy()
+
+    # The first failing check gives the reason
+    checks = [
+        (rows['City'].isna().to_numpy(), 'missing city'),
+        (date_reason != '', date_reason),
+        (np.isnan(temperature) | (temperature == MISSING_TEMPERATURE), 'missing temperature'),
+        ((temperature < TEMPERATURE_RANGE[0]) | (temperature > TEMPERATURE_RANGE[1]), 'temperature out of range'),
+        (duplicate, 'duplicate date in batch'),
+    ]
+    reason = np.select([failed for failed, _ in checks], [message for _, message in checks], default='')
+
+    rejected = rows[reason != ''].assign(reason=reason[reason != ''])
+    accepted = rows.assign(Month=month, Day=day, Year=year, AvgTemperature=temperature)[reason == '']
+    accepted = accepted.astype(DTYPES).rename(str.lower, axis='columns')
+    return accepted.reset_index(drop=True), rejected
+
+
+def ingest(rows, path=DATA_URL):
+    """Validate ``rows`` and append the accepted ones to the dataset.
+
+    Returns the number of rows appended and the rejected rows.
+    """
+    accepted, rejected = validate(rows)
+    stored = stored_rows(accepted, path)
+    if stored.any():
+        again = accepted[stored].set_axis(list(DTYPES), axis='columns').assign(reason='date already stored')
+        rejected = pd.concat([rejected, again], ignore_index=True)
+        accepted = accepted[~stored].reset_index(drop=True)
+    labels = rejected['Month'].astype(str) + '/' + rejected['Day'].astype(str) + '/' + rejected['Year'].astype(str) + ' for ' + rejected['City'].astype(str)
+    log_invalid(labels, rejected['reason'].to_numpy(), what='observation')
+    appended = append_rows(accepted, path) if len(accepted) else 0
+    return appended, rejected
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Append new daily temperature observations to the dataset.')
+    parser.add_argument('rows', help='CSV of new observations with the dataset\'s columns, - for stdin')
+    parser.add_argument('--data', default=DATA_URL, help='temperature CSV to append to')
+    args = parser.parse_args(argv)
+
+    rows = pd.read_csv(sys.stdin if args.rows == '-' else args.rows, dtype=str)
+    try:
+        appended, rejected = ingest(rows, args.data)
+    except ValueError as error:
+        parser.error(str(error))
+    print('Appended {} rows, rejected {}'.format(appended, len(rejected)))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,49 @@
+"""Timers around the dashboard's hot paths.
+
+Each :func:`span` is written as a JSON line to ``metrics.jsonl`` through
+the queued metrics logger, and kept in a per-thread list so the Streamlit
+script can show the timings of the current rerun::
+
+    reset()
+    with span('seasonal.aggregate', city=city):
+        table = aggregates.seasonal_averages(years)
+    recorded()  # [{'span': 'seasonal.aggregate', 'seconds': 0.004, ...}]
+"""
+import contextlib
+import json
+import threading
+import time
+
+from weather.logs import get_metrics_logger
+
+_local = threading.local()
+
+
+def reset():
+    """Start collecting the spans of this thread, e.g. at the top of a rerun."""
+    _local.spans = []
+
+
+def recorded():
+    """Spans recorded on this thread since :func:`reset`."""
+    return list(getattr(_local, 'spans', []))
+
+
+def record(name, seconds, **labels):
+    """Record a timing measured elsewhere."""
+    entry = {'time': round(time.time(), 3), 'span': name, 'seconds': round(seconds, 6)}
+    entry.update(labels)
+    spans = getattr(_local, 'spans', None)
+    if spans is not None:
+        spans.append(entry)
+    get_metrics_logger().info(json.dumps(entry, default=str))
+
+
+@contextlib.contextmanager
+def span(name, **labels):
+    """Time the body of the ``with`` block as ``name``."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record(name, time.perf_counter() - start, **labels)
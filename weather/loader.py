@@ -0,0 +1,338 @@
+"""Typed dataset loader backed by per-city partitioned storage.
+
+The CSV is parsed once, in chunks, into compact dtypes and split into one
+partition per city (see :mod:`weather.storage`). The store is rebuilt only
+when the CSV's modification time or size changes. Loaded rows are kept
+per city and version in :func:`weather.cache.shared_cache`, so Streamlit
+reruns and sessions share one frame and only the selected city's
+partition is ever read.
+
+Building and appending hold a lock file next to the store, so an ingest
+running in its own process and a dashboard rebuilding the store never
+write it at the same time.
+"""
+import contextlib
+import copy
+import datetime
+import functools
+import os
+import threading
+
+try:
+    import fcntl
+except ImportError:  # Windows: the store is only locked within one process
+    fcntl = None
+
+import numpy as np
+import pandas as pd
+
+from weather import models, storage
+from weather.aggregations import GET_SEASONS
+from weather.cache import shared_cache
+from weather.dates import MONTH_LENGTH
+from weather.running import SEASON_OF_MONTH, RunningAggregates
+
+DATA_URL = 'indianapolis_temp.csv'
+STORE_DIR = '.store'
+CHUNK_SIZE = 1000000
+
+# The global archive marks missing readings with -99
+MISSING_TEMPERATURE = -99
+
+DTYPES = {
+    'Region': 'category',
+    'Country': 'category',
+    'State': 'category',
+    'City': 'category',
+    'Month': 'int8',
+    'Day': 'int8',
+    'Year': 'int16',
+    'AvgTemperature': 'float32',
+}
+CATEGORIES = ['region', 'country', 'state', 'city']
+
+# Years are parsed wider than they are stored, so out of range years are
+# dropped by clean() rather than wrapping around in int16
+READ_DTYPES = dict(DTYPES, Year='int32')
+
+# Earliest year of a plausible observation; the global archive has a few
+# rows with years such as 200
+FIRST_YEAR = 1800
+
+_build_lock = threading.RLock()
+
+# Lock file descriptor and nesting depth of the thread holding _build_lock, by store root
+_lock_files = {}
+
+
+def add_seasons(data):
+    """Tag every row with its meteorological season as a categorical column."""
+    codes = SEASON_OF_MONTH[data['month'].to_numpy()]
+    data['season'] = pd.Categorical.from_codes(codes, GET_SEASONS)
+    return data
+
+
+def last_year():
+    """Latest year of a plausible observation, next year to allow for time zones."""
+    return datetime.date.today().year + 1
+
+
+def clean(data):
+    """Drop missing readings and rows whose date does not exist or whose year is implausible."""
+    month = data['month'].to_numpy()
+    day = data['day'].to_numpy()
+    year = data['year'].to_numpy()
+    valid = (data['avgtemperature'].to_numpy() != MISSING_TEMPERATURE) & (month >= 1) & (month <= 12)
+    valid &= (day >= 1) & (day <= MONTH_LENGTH[np.clip(month, 0, 12)])
+    valid &= (year >= FIRST_YEAR) & (year <= last_year())
+    return data[valid]
+
+
+def iter_csv(path=DATA_URL, chunksize=CHUNK_SIZE):
+    """Parse the CSV in chunks of compact dtypes with lowercase column names."""
+    for chunk in pd.read_csv(path, dtype=READ_DTYPES, chunksize=chunksize):
+        chunk.rename(lambda x: str(x).lower(), axis='columns', inplace=True)
+        yield clean(chunk).astype({'year': DTYPES['Year']})
+
+
+def city_labels(data):
+    """Label identifying each row's city, e.g. ``'Indianapolis, Indiana'``.
+
+    The state is used where there is one, otherwise the country, since
+    city names alone are not unique in the global archive.
+    """
+    place = data['state'].astype(object).fillna(data['country'].astype(object))
+    return data['city'].astype(str) + ', ' + place.astype(str)
+
+
+def fingerprint(path):
+    """Key identifying the current contents of ``path``."""
+    stat = os.stat(path)
+    return '{}-{}'.format(stat.st_mtime_ns, stat.st_size)
+
+
+def store_root(path):
+    stem = os.path.splitext(os.path.basename(path))[0]
+    return os.path.join(os.path.dirname(path), STORE_DIR, stem)
+
+
+@contextlib.contextmanager
+def store_lock(path=DATA_URL):
+    """Hold the store of ``path`` against other threads and processes.
+
+    The lock can be taken again by the thread holding it.
+    """
+    root = store_root(path)
+    with _build_lock:
+        if root not in _lock_files:
+            os.makedirs(os.path.dirname(root), exist_ok=True)
+            lock = open(root + '.lock', 'a')
+            if fcntl is not None:
+                fcntl.flock(lock, fcntl.LOCK_EX)
+            _lock_files[root] = [lock, 0]
+        _lock_files[root][1] += 1
+        try:
+            yield
+        finally:
+            _lock_files[root][1] -= 1
+            if not _lock_files[root][1]:
+                _lock_files.pop(root)[0].close()
+
+
+def build_store(path=DATA_URL, chunksize=CHUNK_SIZE):
+    """Split the CSV into per-city partitions, replacing any existing store.
+
+    The running aggregates of every city are accumulated along the way,
+    and the forecasting models are fitted from them. The store is built in
+    a sibling directory and swapped in once complete, so sessions reading
+    the old store are not left without its files.
+    """
+    root = store_root(path)
+    source = fingerprint(path)
+    built = '{}.{}.tmp'.format(root, os.getpid())
+    storage.clear(built)
+    manifest = storage.new_manifest(source)
+    aggregates = {}
+    try:
+        for chunk in iter_csv(path, chunksize):
+            for city, frame in chunk.groupby(city_labels(chunk), sort=False):
+                frame = frame.astype({column: frame[column].cat.remove_unused_categories().dtype for column in CATEGORIES})
+                storage.append_partition(built, manifest, city, frame)
+                aggregates.setdefault(city, RunningAggregates()).update(frame)
+        for city, running in aggregates.items():
+            running.save(storage.aggregates_path(built, manifest, city))
+            models.save_models(storage.models_path(built, manifest, city), models.fit_models(running.moments))
+        os.makedirs(built, exist_ok=True)
+        storage.write_manifest(built, manifest)
+        storage.swap(root, built)
+    finally:
+        storage.clear(built)
+    return manifest
+
+
+@functools.lru_cache(maxsize=8)
+def _read_manifest(root, mtime):
+    return storage.read_manifest(root)
+
+
+def open_store(path=DATA_URL):
+    """Manifest of the store built from ``path``, rebuilding it if the CSV changed.
+
+    The returned manifest is shared between callers and must not be modified.
+    """
+    root = store_root(path)
+    source = fingerprint(path)
+    try:
+        manifest = _read_manifest(root, os.stat(os.path.join(root, storage.MANIFEST)).st_mtime_ns)
+    except FileNotFoundError:
+        manifest = None
+    if manifest is None or manifest['source'] != source:
+        with store_lock(path):
+            # Another process may have appended to the CSV and its store meanwhile
+            manifest = storage.read_manifest(root)
+            if manifest is None or manifest['source'] != fingerprint(path):
+                manifest = build_store(path)
+    return manifest
+
+
+def _read_aggregates(root, manifest, city):
+    # Aggregates saved before the observed bitmap existed are rebuilt once
+    # from the city's rows
+    path = storage.aggregates_path(root, manifest, city)
+    running = RunningAggregates.load(path)
+    if running.observed is None:
+        running = RunningAggregates().update(storage.read_partition(root, manifest, city))
+        running.save(path)
+    return running
+
+
+def stored_rows(data, path=DATA_URL):
+    """Whether each row's city already has an observation on its date.
+
+    ``data`` has the lowercase typed columns :func:`iter_csv` produces.
+    Only the cities' observed bitmaps are read, never their rows.
+    """
+    manifest = open_store(path)
+    stored = np.zeros(len(data), dtype=bool)
+    labels = city_labels(data).to_numpy()
+    for city in np.unique(labels):
+        if city in manifest['cities']:
+            rows = labels == city
+            stored[rows] = load_aggregates(path, city).seen(data[rows])
+    return stored
+
+
+def append_rows(data, path=DATA_URL):
+    """Append already validated rows to the store and the CSV.
+
+    ``data`` has the lowercase typed columns :func:`iter_csv` produces. Each
+    city's rows become a new part file and are folded into its running
+    aggregates; nothing already stored is read or rewritten. The CSV gets
+    the same rows appended, so it stays the complete copy of the dataset
+    and the store is not rebuilt. Rows whose city already has an
+    observation on that date are dropped. Returns the number of rows
+    appended.
+    """
+    root = store_root(path)
+    with store_lock(path):
+        manifest = copy.deepcopy(open_store(path))
+        cities = []
+        appended = []
+        for city, frame in data.groupby(city_labels(data), sort=False):
+            entry = manifest['cities'].get(city)
+            running = RunningAggregates() if entry is None else _read_aggregates(root, manifest, city)
+            frame = frame[~running.seen(frame)]
+            if not len(frame):
+                continue
+            cities.append(city)
+            appended.append(frame)
+            storage.append_partition(root, manifest, city, frame)
+            running.update(frame).save(storage.aggregates_path(root, manifest, city))
+            models.save_models(storage.models_path(root, manifest, city), models.fit_models(running.moments))
+        if not cities:
+            return 0
+
+        with open(path, 'rb+') as f:
+            # Start on a new line if the file does not end with one
+            f.seek(0, os.SEEK_END)
+            if f.tell():
+                f.seek(-1, os.SEEK_END)
+                if f.read(1) != b'\n':
+                    f.write(b'\n')
+        rows = pd.concat(appended)[[column.lower() for column in DTYPES]].set_axis(list(DTYPES), axis='columns')
+        rows.to_csv(path, mode='a', header=False, index=False, float_format='%.6g')
+
+        # Publish the new parts and aggregates
+        manifest['source'] = fingerprint(path)
+        storage.write_manifest(root, manifest)
+        for city in cities:
+            storage.remove_stale(root, manifest, city)
+    return sum(len(frame) for frame in appended)
+
+
+def list_cities(path=DATA_URL):
+    """Labels of every city in the dataset, sorted."""
+    return sorted(open_store(path)['cities'])
+
+
+def city_info(path=DATA_URL, city=None):
+    """Row count, year range and version of one city's partition."""
+    manifest = open_store(path)
+    return manifest['cities'][city or min(manifest['cities'])]
+
+
+def dataset_version(path=DATA_URL, city=None):
+    """Key that changes whenever the data of ``city`` changes."""
+    return '{}:{}'.format(open_store(path)['source'], city_info(path, city)['version'])
+
+
+def _load(path, city):
+    data = storage.read_partition(store_root(path), open_store(path), city)
+    data = data.astype({column: 'category' for column in CATEGORIES})
+    return add_seasons(data)
+
+
+@functools.lru_cache(maxsize=32)
+def _load_aggregates(path, city, version):
+    with store_lock(path):
+        return _read_aggregates(store_root(path), open_store(path), city)
+
+
+def load_aggregates(path=DATA_URL, city=None):
+    """Running aggregates of one city, without reading its rows.
+
+    The returned object is shared between callers and must not be updated.
+    """
+    city = city or min(open_store(path)['cities'])
+    return _load_aggregates(path, city, dataset_version(path, city))
+
+
+@functools.lru_cache(maxsize=32)
+def _load_models(path, city, version):
+    saved = storage.models_path(store_root(path), open_store(path), city)
+    try:
+        return models.load_models(saved)
+    except (FileNotFoundError, KeyError):
+        # Stores built before a model existed are fitted and saved once
+        fits = models.fit_models(_load_aggregates(path, city, version).moments)
+        models.save_models(saved, fits)
+        return fits
+
+
+def load_models(path=DATA_URL, city=None):
+    """Fitted lines of every model of one city, by model name.
+
+    The returned arrays are shared between callers and must not be modified.
+    """
+    city = city or min(open_store(path)['cities'])
+    return _load_models(path, city, dataset_version(path, city))
+
+
+def load_data(path=DATA_URL, city=None):
+    """Load one city's rows, defaulting to the first city in the dataset.
+
+    The returned frame is shared between callers and must not be modified
+    in place.
+    """
+    city = city or min(open_store(path)['cities'])
+    return shared_cache().get((path, city), dataset_version(path, city), ('data',), lambda: _load(path, city))
@@ -0,0 +1,71 @@
+"""Log files for invalid entries and hot-path metrics.
+
+Loggers created here hand their records to a queue; a background thread
+writes them to disk, so logging never blocks a Streamlit rerun on I/O.
+The metrics file is rotated once it reaches ``METRICS_MAX_BYTES``,
+keeping ``METRICS_BACKUPS`` old files.
+"""
+import atexit
+import functools
+import logging
+import logging.handlers
+import queue
+
+LOG_FILE = 'invalidentries.log'
+METRICS_FILE = 'metrics.jsonl'
+
+# Size at which metrics.jsonl is rotated, and rotated files kept
+METRICS_MAX_BYTES = 10 * 1024 * 1024
+METRICS_BACKUPS = 3
+
+formatter = logging.Formatter('%(asctime)s %(levelname)s %(message)s')
+
+# Background writer of each logger, by logger name
+_listeners = {}
+
+
+# Setup function to create log file
+# A max_bytes of 0 never rotates the file
+def setup_logger(name, log_file, level=logging.INFO, fmt=formatter, max_bytes=0, backups=0):
+    # The file is only opened when the first record is written
+    handler = logging.handlers.RotatingFileHandler(log_file, maxBytes=max_bytes, backupCount=backups, delay=True)
+    handler.setFormatter(fmt)
+
+    records = queue.SimpleQueue()
+    if name in _listeners:
+        _listeners.pop(name).stop()
+    listener = _listeners[name] = logging.handlers.QueueListener(records, handler)
+    listener.start()
+
+    logger = logging.getLogger(name)
+    logger.setLevel(level)
+
+    if logger.handlers:
+        logger.handlers = []
+
+    logger.addHandler(logging.handlers.QueueHandler(records))
+
+    return logger
+
+
+@atexit.register
+def _flush():
+    # Write out everything still queued before the process exits
+    for listener in _listeners.values():
+        listener.stop()
+    _listeners.clear()
+
+
+@functools.lru_cache(maxsize=None)
+def get_file_logger():
+    """Logger writing to ``invalidentries.log``, created on first use."""
+    return setup_logger('first_logger', LOG_FILE)
+
+
+@functools.lru_cache(maxsize=None)
+def get_metrics_logger():
+    """Logger writing one JSON object per line to ``metrics.jsonl``, rotated by size."""
+    logger = setup_logger('weather.metrics', METRICS_FILE, fmt=logging.Formatter('%(message)s'),
+                          max_bytes=METRICS_MAX_BYTES, backups=METRICS_BACKUPS)
+    logger.propagate = False
+    return logger
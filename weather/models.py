@@ -0,0 +1,103 @@
+"""Forecasting models behind the Prediction tab and batch predictions.
+
+Every model predicts a line of temperature against year for each calendar
+day, so they all plug into :class:`weather.regression.RegressionIndex`.
+They are fitted from the per day regression moments kept by
+:class:`weather.running.RunningAggregates`, all days at once, without
+reading the rows again:
+
+- ``ols``: an independent least-squares line per calendar day
+- ``smoothed``: per day lines fitted over a window of neighbouring days
+- ``harmonic``: one warming trend for the whole year plus a seasonal
+  cycle of a few harmonics
+
+The RMSE of every model is measured against its fitted values on the
+day's own observations. Fitted parameters are saved next to the city's
+aggregates when the store is built or extended and loaded from there,
+so a prediction never fits anything.
+"""
+import numpy as np
+
+from weather.dates import KEYS
+from weather.running import N, REFERENCE_YEAR, SUM_X, SUM_XX, SUM_XY, SUM_Y, line_rmse, lines_from_moments
+
+DEFAULT_MODEL = 'ols'
+
+# Neighbouring days on each side pooled by the smoothed model
+WINDOW = 3
+
+# Sine and cosine pairs of the harmonic model's seasonal cycle
+HARMONICS = 3
+
+# Labels shown in the dashboard
+LABELS = {
+    'ols': 'Linear trend per day',
+    'smoothed': 'Linear trend over neighbouring days',
+    'harmonic': 'Seasonal harmonics with a shared trend',
+}
+
+
+def fit_ols(moments):
+    slope, intercept, _, _ = lines_from_moments(moments)
+    return slope, intercept
+
+
+def fit_smoothed(moments, window=WINDOW):
+    # Pool each day's moments with its neighbours, wrapping around the new year
+    pooled = sum(np.roll(moments, shift, axis=0) for shift in range(-window, window + 1))
+    slope, intercept, _, _ = lines_from_moments(pooled)
+    return slope, intercept
+
+
+def seasonal_basis(harmonics=HARMONICS):
+    """``len(KEYS) x (1 + 2 * harmonics)`` matrix of a constant and the harmonics of each day."""
+    angle = 2 * np.pi * np.arange(len(KEYS)) / len(KEYS)
+    columns = [np.ones(len(KEYS))]
+    for k in range(1, harmonics + 1):
+        columns += [np.cos(k * angle), np.sin(k * angle)]
+    return np.stack(columns, axis=1)
+
+
+def fit_harmonic(moments, harmonics=HARMONICS):
+    # The design of one observation is [x, basis(day)], so the normal
+    # equations only need each day's n, sum x, sum y, sum x^2 and sum xy
+    basis = seasonal_basis(harmonics)
+    n, sum_x, sum_y = moments[:, N], moments[:, SUM_X], moments[:, SUM_Y]
+    gram = np.empty((basis.shape[1] + 1,) * 2)
+    gram[0, 0] = moments[:, SUM_XX].sum()
+    gram[0, 1:] = gram[1:, 0] = basis.T @ sum_x
+    gram[1:, 1:] = basis.T @ (basis * n[:, None])
+    target = np.concatenate([[moments[:, SUM_XY].sum()], basis.T @ sum_y])
+    coefficients = np.linalg.lstsq(gram, target, rcond=None)[0]
+
+    slope = np.full(len(KEYS), coefficients[0])
+    intercept = basis @ coefficients[1:] - slope * REFERENCE_YEAR
+    return slope, intercept
+
+
+MODELS = {
+    'ols': fit_ols,
+    'smoothed': fit_smoothed,
+    'harmonic': fit_harmonic,
+}
+
+
+def fit_models(moments):
+    """Slope, intercept, RMSE and count arrays of every model, by name."""
+    fits = {}
+    for name, fit in MODELS.items():
+        slope, intercept = fit(moments)
+        fits[name] = (slope, intercept, line_rmse(moments, slope, intercept), moments[:, N].astype('int64'))
+    return fits
+
+
+def save_models(path, fits):
+    np.savez(path, **{'{}.{}'.format(name, field): values
+                      for name, lines in fits.items()
+                      for field, values in zip(['slope', 'intercept', 'rmse', 'count'], lines)})
+
+
+def load_models(path):
+    with np.load(path) as saved:
+        return {name: tuple(saved['{}.{}'.format(name, field)] for field in ['slope', 'intercept', 'rmse', 'count'])
+                for name in MODELS}
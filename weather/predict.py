@@ -0,0 +1,146 @@
+"""Batch temperature predictions for date ranges or files of dates.
+
+Uses the same per calendar day lines as the Prediction tab, from any of
+the models in :mod:`weather.models`.
+Dates are processed in fixed-size chunks and written out as they are
+predicted, so memory stays bounded however many dates are requested.
+Dates in a file that do not exist are skipped and logged to
+``invalidentries.log``.
+
+Usage::
+
+    python -m weather.predict --start 2030-01-01 --end 2050-12-31 --output predictions.csv
+    python -m weather.predict --dates-file dates.txt --format jsonl
+"""
+import argparse
+import json
+import sys
+
+import numpy as np
+import pandas as pd
+
+from weather.dates import POSITION, log_invalid, to_datetime64, validate_dates
+from weather.loader import DATA_URL, list_cities
+from weather.models import DEFAULT_MODEL, MODELS
+from weather.results import regression_index
+
+CHUNK_SIZE = 65536
+
+
+def split_dates(dates):
+    """Year, month and day arrays of a ``datetime64[D]`` array."""
+    months_since_epoch = dates.astype('datetime64[M]')
+    years = dates.astype('datetime64[Y]').astype('int64') + 1970
+    months = months_since_epoch.astype('int64') % 12 + 1
+    days = (dates - months_since_epoch).astype('int64') + 1
+    return years, months, days
+
+
+def predict_dates(index, dates):
+    """Predicted temperature and RMSE for every date in ``dates``.
+
+    ``dates`` is anything ``numpy`` can turn into ``datetime64[D]``. Returns
+    a DataFrame with columns ``date``, ``predicted`` and ``rmse``.
+    """
+    dates = np.asarray(dates, dtype='datetime64[D]')
+    years, months, days = split_dates(dates)
+    rows = POSITION[months, days]
+    predicted = index.slope[rows] * years + index.intercept[rows]
+    return pd.DataFrame({'date': dates.astype(str), 'predicted': predicted.round(2), 'rmse': index.rmse[rows].round(2)})
+
+
+def iter_date_range(start, end, chunk_size=CHUNK_SIZE):
+    """Yield the dates from ``start`` to ``end`` inclusive in chunks."""
+    start = np.datetime64(start, 'D')
+    end = np.datetime64(end, 'D') + 1
+    step = np.timedelta64(chunk_size, 'D')
+    while start < end:
+        stop = min(start + step, end)
+        yield np.arange(start, stop, dtype='datetime64[D]')
+        start = stop
+
+
+def parse_dates(strings):
+    """``datetime64[D]`` array of the valid ISO dates in ``strings``, logging the others."""
+    parts = pd.Series(strings, dtype=object).str.extract(r'^(-?\d+)-(\d+)-(\d+)$')
+    years, months, days, reasons = validate_dates(parts[0], parts[1], parts[2])
+    log_invalid(strings, reasons)
+    valid = reasons == ''
+    return to_datetime64(years[valid], months[valid], days[valid])
+
+
+def iter_date_file(lines, chunk_size=CHUNK_SIZE):
+    """Yield the valid ISO dates listed one per line in ``lines`` in chunks."""
+    chunk = []
+    for line in lines:
+        line = line.strip()
+        if line:
+            chunk.append(line)
+        if len(chunk) == chunk_size:
+            yield parse_dates(chunk)
+            chunk = []
+    if chunk:
+        yield parse_dates(chunk)
+
+
+def write_predictions(index, chunks, out, fmt='csv'):
+    """Predict each chunk of dates and write it to ``out`` as CSV or JSON lines."""
+    total = 0
+    for number, dates in enumerate(chunks):
+        predictions = predict_dates(index, dates)
+        if fmt == 'csv':
+            predictions.to_csv(out, header=(number == 0), index=False)
+        else:
+            for record in predictions.to_dict('records'):
+                out.write(json.dumps(record) + '\n')
+        total += len(predictions)
+    return total
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Predict daily temperatures for a range or list of dates.')
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument('--start', help='first date of the range (YYYY-MM-DD)')
+    source.add_argument('--dates-file', help='file with one YYYY-MM-DD date per line, - for stdin')
+    parser.add_argument('--end', help='last date of the range (YYYY-MM-DD), defaults to --start')
+    parser.add_argument('--output', default='-', help='output file, - for stdout')
+    parser.add_argument('--format', choices=['csv', 'jsonl'], default='csv')
+    parser.add_argument('--data', default=DATA_URL, help='temperature CSV to fit against')
+    parser.add_argument('--city', help='city to fit against, e.g. "Indianapolis, Indiana"')
+    parser.add_argument('--model', choices=list(MODELS), default=DEFAULT_MODEL, help='forecasting model')
+    args = parser.parse_args(argv)
+    if args.city is not None and args.city not in list_cities(args.data):
+        parser.error('unknown city {!r}'.format(args.city))
+    if args.start:
+        try:
+            start, end = np.datetime64(args.start, 'D'), np.datetime64(args.end or args.start, 'D')
+        except ValueError as error:
+            parser.error(str(error))
+        if start > end:
+            parser.error('--start {} is after --end {}'.format(args.start, args.end))
+
+    lines = None
+    if args.dates_file is not None:
+        try:
+            lines = sys.stdin if args.dates_file == '-' else open(args.dates_file)
+        except OSError as error:
+            parser.error(str(error))
+
+    index = regression_index(args.data, args.city, args.model)
+    out = sys.stdout if args.output == '-' else open(args.output, 'w', newline='')
+    try:
+        if args.start:
+            chunks = iter_date_range(start, end)
+            write_predictions(index, chunks, out, args.format)
+        else:
+            with lines:
+                write_predictions(index, iter_date_file(lines), out, args.format)
+    except ValueError as error:
+        parser.error(str(error))
+    finally:
+        if out is not sys.stdout:
+            out.close()
+
+
+if __name__ == '__main__':
+    main()
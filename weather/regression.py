@@ -0,0 +1,64 @@
+"""Per calendar day regression index for the Prediction tab.
+
+Every (month, day) key, February 29 included, gets a line of temperature
+against year from one of the models in :mod:`weather.models`. The lines
+are fitted once per dataset version and loaded from the store, so a
+prediction is a lookup rather than a scan of the dataset. The index of
+each city and model is built and cached by
+:func:`weather.results.regression_index`.
+"""
+import collections
+
+import numpy as np
+import pandas as pd
+
+from weather.dates import KEYS, POSITION
+
+Fit = collections.namedtuple('Fit', ['slope', 'intercept', 'rmse', 'count'])
+
+
+class RegressionIndex:
+    """Fitted slope, intercept, RMSE and sample count for every calendar day.
+
+    ``years`` is the sorted array of years in the data, ``temperatures``
+    the matching ``len(KEYS) x len(years)`` matrix, NaN where a day has no
+    observation, and ``lines`` the slope, intercept, RMSE and count arrays.
+    """
+
+    def __init__(self, years, temperatures, lines):
+        self.years = np.asarray(years)
+        self.temperatures = temperatures
+        self.slope, self.intercept, self.rmse, self.count = lines
+
+    def position(self, month, day):
+        row = POSITION[month, day]
+        if row < 0:
+            raise KeyError((month, day))
+        return row
+
+    def lookup(self, month, day):
+        """Fitted line for one calendar day."""
+        row = self.position(month, day)
+        return Fit(self.slope[row], self.intercept[row], self.rmse[row], int(self.count[row]))
+
+    def predict(self, month, day, year):
+        fit = self.lookup(month, day)
+        return fit.slope * year + fit.intercept
+
+    def observations(self, month, day):
+        """Observed temperatures of one calendar day with columns ``Year`` and ``avgtemperature``."""
+        row = self.temperatures[self.position(month, day)]
+        observed = ~np.isnan(row)
+        return pd.DataFrame({'Year': self.years[observed], 'avgtemperature': row[observed]})
+
+
+def observed_temperatures(data):
+    """Sorted years and the ``len(KEYS) x len(years)`` temperature matrix of the data."""
+    years = np.sort(data['year'].unique())
+    rows = POSITION[data['month'].to_numpy(), data['day'].to_numpy()]
+    columns = np.searchsorted(years, data['year'].to_numpy())
+
+    temperatures = np.full((len(KEYS), len(years)), np.nan)
+    temperatures[rows, columns] = data['avgtemperature'].to_numpy()
+    return years, temperatures
+
@@ -0,0 +1,97 @@
+"""Dashboard results shared by every session through :mod:`weather.cache`.
+
+Each result depends only on the dataset version of one city and the
+query's parameters, so every session asking the same question gets the
+same cached object. The scope of a result is ``(path, city)``; appending
+rows to a city changes its version and drops its cached results.
+
+The charts whose content only changes with the data are cached as
+serialized Vega-Lite specs, so a rerun renders them without building,
+validating or serializing an Altair chart.
+"""
+import collections
+
+from weather.cache import shared_cache
+from weather.aggregations import daily_temperatures_by_year
+from weather.charts import chart_spec, monthly_average_chart, seasonal_chart, yearly_chart
+from weather.loader import DATA_URL, dataset_version, load_aggregates, load_data, load_models, open_store
+from weather.models import DEFAULT_MODEL
+from weather.regression import RegressionIndex, observed_temperatures
+
+Prediction = collections.namedtuple('Prediction', ['fit', 'temperature', 'observations'])
+
+
+def _shared(name, path, city, compute, *params):
+    city = city or min(open_store(path)['cities'])
+    return shared_cache().get((path, city), dataset_version(path, city), (name,) + params, lambda: compute(path, city))
+
+
+def is_cached(path, city, name, *params):
+    """Whether the result ``name`` with ``params`` of a city is in the shared cache."""
+    city = city or min(open_store(path)['cities'])
+    return shared_cache().contains((path, city), dataset_version(path, city), (name,) + params)
+
+
+def complete_years(path=DATA_URL, city=None):
+    """Years of a city with a full twelve months of data."""
+    return _shared('years', path, city, lambda path, city: load_aggregates(path, city).complete_years())
+
+
+def seasonal_averages(path=DATA_URL, city=None):
+    """Seasonal table of a city's complete years."""
+    return _shared('seasonal', path, city, lambda path, city: load_aggregates(path, city).seasonal_averages(complete_years(path, city)))
+
+
+def daily_month_averages(path=DATA_URL, city=None):
+    """Day x month average table of a city."""
+    return _shared('monthly', path, city, lambda path, city: load_aggregates(path, city).daily_month_averages())
+
+
+def yearly_averages(path=DATA_URL, city=None):
+    """Yearly table of a city's complete years."""
+    return _shared('yearly', path, city, lambda path, city: load_aggregates(path, city).yearly_averages(complete_years(path, city)))
+
+
+def seasonal_spec(path=DATA_URL, city=None):
+    """Serialized Seasonal chart of a city."""
+    return _shared('seasonal.spec', path, city, lambda path, city: chart_spec(seasonal_chart(seasonal_averages(path, city))))
+
+
+def monthly_average_spec(path=DATA_URL, city=None):
+    """Serialized day x month average chart of a city."""
+    return _shared('monthly.spec', path, city, lambda path, city: chart_spec(monthly_average_chart(daily_month_averages(path, city))))
+
+
+def yearly_spec(path=DATA_URL, city=None):
+    """Serialized Yearly chart of a city."""
+    return _shared('yearly.spec', path, city, lambda path, city: chart_spec(yearly_chart(yearly_averages(path, city))))
+
+
+def daily_by_year(path=DATA_URL, city=None):
+    """Daily temperatures of a city split into one frame per year."""
+    return _shared('daily', path, city, lambda path, city: daily_temperatures_by_year(load_data(path, city)))
+
+
+def year_temperatures(year, path=DATA_URL, city=None):
+    """Daily temperatures of one year of a city, or None if the year has no data."""
+    return daily_by_year(path, city).get(year)
+
+
+def observations(path=DATA_URL, city=None):
+    """Sorted years and day x year temperature matrix of a city."""
+    return _shared('observations', path, city, lambda path, city: observed_temperatures(load_data(path, city)))
+
+
+def regression_index(path=DATA_URL, city=None, model=DEFAULT_MODEL):
+    """Regression index of a city from the stored lines of ``model``."""
+    return _shared('regression', path, city,
+                   lambda path, city: RegressionIndex(*observations(path, city), load_models(path, city)[model]), model)
+
+
+def prediction(month, day, year, path=DATA_URL, city=None, model=DEFAULT_MODEL):
+    """Fitted line, predicted temperature and past observations of one date."""
+    def compute(path, city):
+        regression = regression_index(path, city, model)
+        fit = regression.lookup(month, day)
+        return Prediction(fit, fit.slope * year + fit.intercept, regression.observations(month, day))
+    return _shared('prediction', path, city, compute, model, month, day, year)
@@ -0,0 +1,186 @@
+"""Running sums behind every tab, updated one batch of rows at a time.
+
+:class:`RunningAggregates` keeps per year x month and per day x month sums
+and counts, per calendar day regression moments, and a year x calendar day
+bitmap of the dates already observed, so duplicates can be refused. Folding in new rows
+costs O(rows), and the Seasonal, Monthly and Yearly tables and the
+regression lines are derived from the sums without touching the rows
+again.
+"""
+import numpy as np
+import pandas as pd
+
+from weather.aggregations import GET_SEASONS, daily_month_table, seasonal_table, yearly_table
+from weather.dates import KEYS, POSITION
+
+# Years are offset by this in the regression moments to keep the sums small
+REFERENCE_YEAR = 2000
+
+# Column of each regression moment
+N, SUM_X, SUM_Y, SUM_XX, SUM_XY, SUM_YY = range(6)
+
+# Index into GET_SEASONS for each month number (index 0 is unused)
+SEASON_OF_MONTH = np.array([-1, 0, 0, 1, 1, 1, 2, 2, 2, 3, 3, 3, 0], dtype='int8')
+
+
+def line_rmse(moments, slope, intercept):
+    """RMSE of each calendar day's observations about the line ``slope * year + intercept``.
+
+    Computed from the day's moments, so any model's per day lines can be
+    scored without the rows.
+    """
+    n, sum_x, sum_y, sum_xx, sum_xy, sum_yy = moments.T
+    offset_intercept = intercept + slope * REFERENCE_YEAR
+    with np.errstate(invalid='ignore', divide='ignore'):
+        squared_error = (sum_yy - 2 * offset_intercept * sum_y - 2 * slope * sum_xy + n * offset_intercept ** 2
+                         + 2 * offset_intercept * slope * sum_x + slope ** 2 * sum_xx)
+        return np.sqrt(np.maximum(squared_error, 0) / n)
+
+
+def lines_from_moments(moments):
+    """Slope, intercept, RMSE and count of every calendar day's least-squares line.
+
+    ``moments`` is a ``len(KEYS) x 6`` array of n, sum x, sum y, sum x^2,
+    sum xy and sum y^2, with x the year minus ``REFERENCE_YEAR``. The RMSE
+    is taken against the fitted values.
+    """
+    n, sum_x, sum_y, sum_xx, sum_xy, sum_yy = moments.T
+    with np.errstate(invalid='ignore', divide='ignore'):
+        mean_x = sum_x / n
+        mean_y = sum_y / n
+        slope = (sum_xy - n * mean_x * mean_y) / (sum_xx - n * mean_x ** 2)
+        intercept = mean_y - slope * mean_x - slope * REFERENCE_YEAR
+    return slope, intercept, line_rmse(moments, slope, intercept), n.astype('int64')
+
+
+def day_moments(months, days, years, temperatures):
+    """Regression moments of a batch of observations, one row per calendar day."""
+    rows = POSITION[months, days]
+    x = years.astype('float64') - REFERENCE_YEAR
+    y = temperatures.astype('float64')
+    weights = [None, x, y, x * x, x * y, y * y]
+    return np.stack([np.bincount(rows, weights=w, minlength=len(KEYS)) for w in weights], axis=1)
+
+
+class RunningAggregates:
+    """Sums and counts of every observation folded in so far."""
+
+    def __init__(self, first_year=None, month_sum=None, month_count=None,
+                 day_sum=None, day_count=None, moments=None, observed=None):
+        self.first_year = first_year
+        self.month_sum = np.zeros((0, 12)) if month_sum is None else month_sum
+        self.month_count = np.zeros((0, 12), dtype='int64') if month_count is None else month_count
+        self.day_sum = np.zeros((32, 13)) if day_sum is None else day_sum
+        self.day_count = np.zeros((32, 13), dtype='int64') if day_count is None else day_count
+        self.moments = np.zeros((len(KEYS), 6)) if moments is None else moments
+        self.observed = np.zeros((len(self.month_sum), len(KEYS)), dtype=bool) if observed is None else observed
+
+    @property
+    def years(self):
+        """Every year from the first to the last observed."""
+        if self.first_year is None:
+            return np.arange(0)
+        return np.arange(self.first_year, self.first_year + len(self.month_sum))
+
+    def _cover(self, first, last):
+        # Grow the year x month arrays so they span first..last
+        if self.first_year is None:
+            self.first_year = first
+        before = max(self.first_year - first, 0)
+        after = max(last - (self.first_year + len(self.month_sum) - 1), 0)
+        if before or after:
+            self.month_sum = np.pad(self.month_sum, ((before, after), (0, 0)))
+            self.month_count = np.pad(self.month_count, ((before, after), (0, 0)))
+            self.observed = np.pad(self.observed, ((before, after), (0, 0)))
+            self.first_year -= before
+
+    def update(self, data):
+        """Fold in the rows of ``data`` (columns year, month, day, avgtemperature)."""
+        if len(data) == 0:
+            return self
+        years = data['year'].to_numpy().astype('int64')
+        months = data['month'].to_numpy().astype('int64')
+        days = data['day'].to_numpy().astype('int64')
+        temperatures = data['avgtemperature'].to_numpy().astype('float64')
+        self._cover(int(years.min()), int(years.max()))
+
+        cells = (years - self.first_year) * 12 + (months - 1)
+        size = self.month_sum.size
+        self.month_sum += np.bincount(cells, weights=temperatures, minlength=size).reshape(-1, 12)
+        self.month_count += np.bincount(cells, minlength=size).reshape(-1, 12)
+
+        cells = days * 13 + months
+        self.day_sum += np.bincount(cells, weights=temperatures, minlength=32 * 13).reshape(32, 13)
+        self.day_count += np.bincount(cells, minlength=32 * 13).reshape(32, 13)
+
+        self.moments += day_moments(months, days, years, temperatures)
+        self.observed[years - self.first_year, POSITION[months, days]] = True
+        return self
+
+    def seen(self, data):
+        """Whether each row's date was already folded in, as a boolean array."""
+        if self.first_year is None or len(data) == 0:
+            return np.zeros(len(data), dtype=bool)
+        rows = data['year'].to_numpy().astype('int64') - self.first_year
+        inside = (rows >= 0) & (rows < len(self.observed))
+        seen = np.zeros(len(data), dtype=bool)
+        keys = POSITION[data['month'].to_numpy().astype('int64'), data['day'].to_numpy().astype('int64')]
+        seen[inside] = self.observed[rows[inside], keys[inside]]
+        return seen
+
+    def complete_years(self):
+        """Years with observations in all twelve months."""
+        return [int(year) for year in self.years[(self.month_count > 0).all(axis=1)]]
+
+    def observed_years(self):
+        return [int(year) for year in self.years[self.month_count.sum(axis=1) > 0]]
+
+    def seasonal_averages(self, years=None):
+        """Same table as :func:`weather.aggregations.seasonal_averages`."""
+        sums = np.zeros((len(self.month_sum), 4))
+        counts = np.zeros((len(self.month_sum), 4))
+        for month in range(1, 13):
+            sums[:, SEASON_OF_MONTH[month]] += self.month_sum[:, month - 1]
+            counts[:, SEASON_OF_MONTH[month]] += self.month_count[:, month - 1]
+        with np.errstate(invalid='ignore', divide='ignore'):
+            means = pd.DataFrame(sums / counts, index=self.years, columns=GET_SEASONS)
+        return seasonal_table(means, self.observed_years() if years is None else list(years))
+
+    def daily_month_averages(self):
+        """Same table as :func:`weather.aggregations.daily_month_averages`."""
+        with np.errstate(invalid='ignore', divide='ignore'):
+            means = pd.DataFrame(self.day_sum / self.day_count)
+        return daily_month_table(means)
+
+    def yearly_averages(self, years=None):
+        """Same table as :func:`weather.aggregations.yearly_averages`."""
+        with np.errstate(invalid='ignore', divide='ignore'):
+            means = pd.Series(self.month_sum.sum(axis=1) / self.month_count.sum(axis=1), index=self.years)
+        return yearly_table(means, self.observed_years() if years is None else list(years))
+
+    def regression_lines(self):
+        """Slope, intercept, RMSE and count arrays, one entry per calendar day."""
+        return lines_from_moments(self.moments)
+
+    def save(self, path):
+        np.savez(path, empty=np.array(self.first_year is None), first_year=np.array(self.first_year or 0),
+                 month_sum=self.month_sum, month_count=self.month_count,
+                 day_sum=self.day_sum, day_count=self.day_count, moments=self.moments, observed=self.observed)
+
+    @classmethod
+    def load(cls, path):
+        """Aggregates saved by :meth:`save`.
+
+        Files written before the observed bitmap existed load with
+        ``observed`` set to None; rebuild them from the rows.
+        """
+        with np.load(path) as saved:
+            first_year = int(saved['first_year'])
+            # Files written before the empty flag used -1 for no years
+            empty = bool(saved['empty']) if 'empty' in saved.files else first_year < 0
+            running = cls(None if empty else first_year, saved['month_sum'], saved['month_count'],
+                          saved['day_sum'], saved['day_count'], saved['moments'],
+                          saved['observed'] if 'observed' in saved.files else None)
+            if 'observed' not in saved.files:
+                running.observed = None
+            return running
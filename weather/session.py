@@ -0,0 +1,40 @@
+"""Login state kept in a Streamlit session.
+
+``state`` is ``st.session_state`` or any other mapping. Once a user has
+logged in, reruns check the session's token against the server-side
+registry in :mod:`weather.users`, so a token that expired or was revoked
+ends the login; the database is queried again only when the session
+expires or a different user logs in.
+"""
+from weather.users import DB_PATH, end_session, login_user, session_user
+
+AUTH_KEY = 'auth'
+
+
+def current_user(state):
+    """Logged in username of the session, or None once its token expires or is revoked."""
+    auth = state.get(AUTH_KEY)
+    if auth is None:
+        return None
+    if session_user(auth['token']) != auth['username']:
+        log_out(state)
+        return None
+    return auth['username']
+
+
+def log_in(state, username, password, path=DB_PATH):
+    """Check the credentials against the database and record the login in ``state``."""
+    log_out(state)
+    session = login_user(username, password, path)
+    if session is None:
+        return False
+    token, expires = session
+    state[AUTH_KEY] = {'username': username, 'token': token, 'expires': expires}
+    return True
+
+
+def log_out(state):
+    """Forget the session's login, if any."""
+    auth = state.pop(AUTH_KEY, None)
+    if auth is not None:
+        end_session(auth['token'])
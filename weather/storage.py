@@ -0,0 +1,132 @@
+"""Partitioned on-disk storage of the temperature dataset.
+
+Every city gets its own directory of Parquet part files, so loading one
+city never reads another city's rows. New rows are appended as new part
+files. A JSON manifest at the root records each city's partition
+directory, row count, year range and version; files are only visible
+once the manifest referencing them has been written.
+
+Each city also keeps the running aggregates of its rows (see
+:mod:`weather.running`) and the forecasting models fitted from them (see
+:mod:`weather.models`), saved under the city's version.
+
+Layout::
+
+    <root>/manifest.json
+    <root>/<city slug>/part-00000.parquet
+    <root>/<city slug>/part-00001.parquet
+    <root>/<city slug>/aggregates-00002.npz
+    <root>/<city slug>/models-00002.npz
+"""
+import json
+import os
+import re
+import shutil
+
+import pandas as pd
+
+MANIFEST = 'manifest.json'
+
+
+def city_slug(city):
+    """Directory name for a city label."""
+    return re.sub(r'[^a-z0-9]+', '-', city.lower()).strip('-')
+
+
+def new_manifest(source):
+    return {'source': source, 'cities': {}}
+
+
+def read_manifest(root):
+    """The store's manifest, or None if the store has not been built."""
+    try:
+        with open(os.path.join(root, MANIFEST)) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+def write_manifest(root, manifest):
+    # Replace the manifest atomically so readers never see a partial file
+    path = os.path.join(root, MANIFEST)
+    tmp = '{}.{}.tmp'.format(path, os.getpid())
+    with open(tmp, 'w') as f:
+        json.dump(manifest, f, indent=1, sort_keys=True)
+    os.replace(tmp, path)
+
+
+def clear(root):
+    """Remove the whole store."""
+    shutil.rmtree(root, ignore_errors=True)
+
+
+def swap(root, built):
+    """Replace the store at ``root`` with the complete store built at ``built``.
+
+    The old store is renamed aside before the new one is renamed into
+    place, since a directory can't replace a non-empty one, and is only
+    removed after that. Readers therefore see the old store or the new
+    one, never one being written.
+    """
+    old = '{}.{}.old'.format(root, os.getpid())
+    clear(old)
+    try:
+        os.replace(root, old)
+    except FileNotFoundError:
+        pass
+    os.replace(built, root)
+    clear(old)
+
+
+def append_partition(root, manifest, city, frame):
+    """Write ``frame`` as a new part file of ``city`` and update ``manifest``.
+
+    The manifest is only changed in memory; call :func:`write_manifest`
+    once all parts are written.
+    """
+    entry = manifest['cities'].setdefault(city, {
+        'slug': city_slug(city), 'rows': 0, 'parts': 0, 'version': 0,
+        'first_year': None, 'last_year': None,
+    })
+    directory = os.path.join(root, entry['slug'])
+    os.makedirs(directory, exist_ok=True)
+    frame.to_parquet(os.path.join(directory, 'part-{:05d}.parquet'.format(entry['parts'])), index=False)
+
+    first_year, last_year = int(frame['year'].min()), int(frame['year'].max())
+    entry['rows'] += len(frame)
+    entry['parts'] += 1
+    entry['version'] += 1
+    entry['first_year'] = first_year if entry['first_year'] is None else min(entry['first_year'], first_year)
+    entry['last_year'] = last_year if entry['last_year'] is None else max(entry['last_year'], last_year)
+    return entry
+
+
+def aggregates_path(root, manifest, city):
+    """File holding the running aggregates of ``city`` at its current version."""
+    entry = manifest['cities'][city]
+    return os.path.join(root, entry['slug'], 'aggregates-{:05d}.npz'.format(entry['version']))
+
+
+def models_path(root, manifest, city):
+    """File holding the fitted models of ``city`` at its current version."""
+    entry = manifest['cities'][city]
+    return os.path.join(root, entry['slug'], 'models-{:05d}.npz'.format(entry['version']))
+
+
+def remove_stale(root, manifest, city):
+    """Delete aggregates and models files of versions older than the manifest's."""
+    current = {aggregates_path(root, manifest, city), models_path(root, manifest, city)}
+    directory = os.path.join(root, manifest['cities'][city]['slug'])
+    for name in os.listdir(directory):
+        path = os.path.join(directory, name)
+        if name.startswith(('aggregates-', 'models-')) and path not in current:
+            os.remove(path)
+
+
+def read_partition(root, manifest, city):
+    """All rows of one city, in the order they were appended."""
+    entry = manifest['cities'][city]
+    directory = os.path.join(root, entry['slug'])
+    parts = [pd.read_parquet(os.path.join(directory, 'part-{:05d}.parquet'.format(part)))
+             for part in range(entry['parts'])]
+    return pd.concat(parts, ignore_index=True)
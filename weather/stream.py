@@ -0,0 +1,106 @@
+"""Out-of-core aggregation of temperature archives of any size.
+
+The CSV is read in chunks and each chunk is folded into
+:class:`weather.running.RunningAggregates`, the same running sums the
+dashboard's tables come from. Neither the full table nor the partitioned
+store is ever materialized, so memory is bounded by the chunk size
+whatever the size of the archive.
+
+The command line aggregates one city, or every city separately; rows of
+different cities are never blended into one table.
+
+Usage::
+
+    python -m weather.stream archive.csv --city "Indianapolis, Indiana" --table seasonal --output seasonal.csv
+    python -m weather.stream archive.csv --city "Indianapolis, Indiana" --table lines
+    python -m weather.stream archive.csv --by-city --save aggregates/
+"""
+import argparse
+import os
+import sys
+
+import pandas as pd
+
+from weather.dates import KEYS
+from weather.loader import CHUNK_SIZE, DATA_URL, city_labels, iter_csv
+from weather.models import DEFAULT_MODEL, MODELS
+from weather.running import N, RunningAggregates, line_rmse
+from weather.storage import city_slug
+
+
+def stream_aggregates(path=DATA_URL, city=None, chunksize=CHUNK_SIZE):
+    """Running aggregates of one city, or of every row if ``city`` is None."""
+    running = RunningAggregates()
+    for chunk in iter_csv(path, chunksize):
+        running.update(chunk if city is None else chunk[(city_labels(chunk) == city).to_numpy()])
+    return running
+
+
+def stream_city_aggregates(path=DATA_URL, chunksize=CHUNK_SIZE):
+    """Running aggregates of every city, by city label, from one pass."""
+    aggregates = {}
+    for chunk in iter_csv(path, chunksize):
+        for city, frame in chunk.groupby(city_labels(chunk), sort=False):
+            aggregates.setdefault(city, RunningAggregates()).update(frame)
+    return aggregates
+
+
+def lines_table(running, model=DEFAULT_MODEL):
+    """Fitted line of every calendar day as a DataFrame indexed by (month, day)."""
+    slope, intercept = MODELS[model](running.moments)
+    index = pd.MultiIndex.from_tuples(KEYS, names=['month', 'day'])
+    return pd.DataFrame({'slope': slope, 'intercept': intercept, 'rmse': line_rmse(running.moments, slope, intercept),
+                         'count': running.moments[:, N].astype('int64')}, index=index)
+
+
+def table(running, name, model=DEFAULT_MODEL):
+    """One of the dashboard's tables, computed from running aggregates.
+
+    Seasonal and yearly tables cover the complete years, as in the dashboard.
+    """
+    if name == 'seasonal':
+        return running.seasonal_averages(running.complete_years())
+    if name == 'monthly':
+        return running.daily_month_averages()
+    if name == 'yearly':
+        return running.yearly_averages(running.complete_years())
+    return lines_table(running, model).reset_index()
+
+
+TABLES = ['seasonal', 'monthly', 'yearly', 'lines']
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Aggregate a temperature archive without loading it into memory.')
+    parser.add_argument('archive', nargs='?', default=DATA_URL, help='temperature CSV')
+    scope = parser.add_mutually_exclusive_group(required=True)
+    scope.add_argument('--city', help='only this city, e.g. "Indianapolis, Indiana"')
+    scope.add_argument('--by-city', action='store_true', help='aggregate every city separately; requires --save')
+    parser.add_argument('--table', choices=TABLES, default='seasonal', help='table to write')
+    parser.add_argument('--model', choices=list(MODELS), default=DEFAULT_MODEL, help='model of the lines table')
+    parser.add_argument('--output', default='-', help='output CSV, - for stdout')
+    parser.add_argument('--save', help='directory to save the running aggregates to, one .npz per city')
+    parser.add_argument('--chunksize', type=int, default=CHUNK_SIZE, help='rows read at a time')
+    args = parser.parse_args(argv)
+    if args.by_city and not args.save:
+        parser.error('--by-city requires --save')
+
+    if args.by_city:
+        aggregates = stream_city_aggregates(args.archive, args.chunksize)
+    else:
+        aggregates = {args.city: stream_aggregates(args.archive, args.city, args.chunksize)}
+    if args.city and not aggregates[args.city].observed_years():
+        parser.error('no rows for city {!r}'.format(args.city))
+
+    if args.save:
+        os.makedirs(args.save, exist_ok=True)
+        for city, running in aggregates.items():
+            running.save(os.path.join(args.save, city_slug(city) + '.npz'))
+        print('Saved the aggregates of {} cities to {}'.format(len(aggregates), args.save), file=sys.stderr)
+    if not args.by_city:
+        (running,) = aggregates.values()
+        table(running, args.table, args.model).to_csv(sys.stdout if args.output == '-' else args.output, index=False)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,164 @@
+"""User accounts stored in the SQLite database.
+
+Connections come from a small per-process pool, so concurrent Streamlit
+sessions never share a cursor. The schema, WAL mode and the unique index
+on ``username`` are set up once, when the pool is first created; a
+database that already has the same username twice keeps its accounts and
+goes without the index, which is logged to ``invalidentries.log``.
+Passwords are stored as salted PBKDF2 hashes; accounts created with the
+old unsalted MD5 hashes are upgraded the next time they log in.
+
+A successful login returns a session token that expires after
+``SESSION_TTL`` seconds. Checking a token is a dict lookup, so reruns of
+the script don't repeat the slow password hash.
+"""
+import contextlib
+import functools
+import hashlib
+import hmac
+import queue
+import secrets
+import sqlite3
+import threading
+import time
+
+from weather.logs import get_file_logger
+
+DB_PATH = 'dbdata.db'
+POOL_SIZE = 8
+
+ALGORITHM = 'pbkdf2_sha256'
+ITERATIONS = 260000
+
+# Seconds a session token stays valid
+SESSION_TTL = 30 * 60
+
+
+class ConnectionPool:
+    """Reusable SQLite connections shared by the threads of one process."""
+
+    def __init__(self, path, size=POOL_SIZE):
+        self.path = path
+        self._idle = queue.LifoQueue(maxsize=size)
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA synchronous=NORMAL')
+        return conn
+
+    @contextlib.contextmanager
+    def connection(self):
+        """Borrow a connection, committing on success and rolling back on error."""
+        try:
+            conn = self._idle.get_nowait()
+        except queue.Empty:
+            conn = self._connect()
+        try:
+            with conn:
+                yield conn
+        finally:
+            try:
+                self._idle.put_nowait(conn)
+            except queue.Full:
+                conn.close()
+
+
+def create_usertable(conn):
+    """Create the user table and its unique username index if missing.
+
+    Older databases allowed the same username twice. Their accounts are
+    left alone and the index is not created until the duplicates are
+    resolved by hand.
+    """
+    conn.execute('CREATE TABLE IF NOT EXISTS userstable(username TEXT, password TEXT)')
+    duplicates = conn.execute('SELECT COUNT(*) FROM (SELECT username FROM userstable GROUP BY username HAVING COUNT(*) > 1)').fetchone()[0]
+    if duplicates:
+        get_file_logger().info('userstable has {} usernames with more than one account; '
+                               'not creating the unique username index'.format(duplicates))
+        return
+    conn.execute('CREATE UNIQUE INDEX IF NOT EXISTS userstable_username ON userstable(username)')
+
+
+@functools.lru_cache(maxsize=None)
+def get_pool(path=DB_PATH):
+    """Connection pool for ``path``, setting up the schema on first use."""
+    pool = ConnectionPool(path)
+    with pool.connection() as conn:
+        create_usertable(conn)
+    return pool
+
+
+def _md5(value):
+    return hashlib.md5(str.encode(value)).hexdigest()
+
+
+def hash_password(password, salt=None, iterations=ITERATIONS):
+    """Salted PBKDF2 hash of ``password`` as ``algorithm$iterations$salt$hash``."""
+    salt = salt or secrets.token_hex(16)
+    digest = hashlib.pbkdf2_hmac('sha256', str.encode(password), str.encode(salt), iterations).hex()
+    return '{}${}${}${}'.format(ALGORITHM, iterations, salt, digest)
+
+
+def verify_password(password, stored):
+    """Check ``password`` against a stored hash, PBKDF2 or legacy MD5."""
+    if stored.startswith(ALGORITHM + '$'):
+        _, iterations, salt, _ = stored.split('$')
+        return hmac.compare_digest(hash_password(password, salt, int(iterations)), stored)
+    return hmac.compare_digest(_md5(password), stored)
+
+
+# Add hashed username and salted password hash into database
+# Returns False if the username is already taken
+# The insert checks for the username itself too, for databases without the unique index
+def add_userdata(username, password, path=DB_PATH):
+    try:
+        with get_pool(path).connection() as conn:
+            inserted = conn.execute('INSERT INTO userstable(username, password) SELECT ?, ? '
+                                    'WHERE NOT EXISTS (SELECT 1 FROM userstable WHERE username = ?)',
+                                    (_md5(username), hash_password(password), _md5(username))).rowcount
+    except sqlite3.IntegrityError:
+        return False
+    return inserted == 1
+
+
+_sessions = {}
+_sessions_lock = threading.Lock()
+
+
+# Check username and password against the database
+# Returns a session token and its expiry time if they match, otherwise None
+def login_user(username, password, path=DB_PATH, ttl=SESSION_TTL):
+    with get_pool(path).connection() as conn:
+        row = conn.execute('SELECT password FROM userstable WHERE username = ?', (_md5(username),)).fetchone()
+        if row is None or not verify_password(password, row[0]):
+            return None
+        if not row[0].startswith(ALGORITHM + '$'):
+            conn.execute('UPDATE userstable SET password = ? WHERE username = ?', (hash_password(password), _md5(username)))
+
+    token = secrets.token_urlsafe(32)
+    now = time.time()
+    with _sessions_lock:
+        # Drop expired tokens so abandoned sessions don't pile up
+        for expired in [key for key, (_, expires) in _sessions.items() if expires <= now]:
+            del _sessions[expired]
+        _sessions[token] = (username, now + ttl)
+    return token, now + ttl
+
+
+def session_user(token):
+    """Username a session token was issued to, or None if it is unknown or expired."""
+    username, expires = _sessions.get(token, (None, 0))
+    return username if expires > time.time() else None
+
+
+def end_session(token):
+    """Revoke a session token."""
+    with _sessions_lock:
+        _sessions.pop(token, None)
+
+
+# View all users in the database
+def view_all_users(path=DB_PATH):
+    with get_pool(path).connection() as conn:
+        return conn.execute('SELECT * FROM userstable').fetchall()
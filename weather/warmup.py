@@ -0,0 +1,122 @@
+"""Background warm-up of every tab's results.
+
+:func:`warm_up` queues the tables, chart specs and regression indexes of
+the default city, or of the cities it is given, on a thread pool. Results
+are published through :func:`weather.results.shared_cache`, whose size is
+bounded, and only once they are complete, so a session never sees a
+partial result. Calling it again is cheap: a task is only queued again
+when its results are not cached at the city's current dataset version and
+it is not already queued.
+
+The dashboard checks :func:`warming` before reading a tab's results and
+only then shows a "warming" indicator while it calls :func:`wait`.
+"""
+import concurrent.futures
+import functools
+import os
+import threading
+import time
+
+from weather import results
+from weather.instrument import record
+from weather.loader import DATA_URL, dataset_version, list_cities
+from weather.models import MODELS
+
+WORKERS = min(4, os.cpu_count() or 1)
+
+_lock = threading.Lock()
+
+# (version, future) of every queued task, by (path, city, task)
+_futures = {}
+
+
+def _seasonal(path, city):
+    return [(('seasonal.spec',), functools.partial(results.seasonal_spec, path, city))]
+
+
+def _monthly(path, city):
+    return [(('monthly.spec',), functools.partial(results.monthly_average_spec, path, city)),
+            (('daily',), functools.partial(results.daily_by_year, path, city))]
+
+
+def _yearly(path, city):
+    return [(('yearly.spec',), functools.partial(results.yearly_spec, path, city))]
+
+
+def _prediction(path, city):
+    return [(('regression', model), functools.partial(results.regression_index, path, city, model)) for model in MODELS]
+
+
+# Cache keys and computations of the results each tab needs, by tab
+TASKS = {
+    'seasonal': _seasonal,
+    'monthly': _monthly,
+    'yearly': _yearly,
+    'prediction': _prediction,
+}
+
+
+@functools.lru_cache(maxsize=None)
+def _executor():
+    return concurrent.futures.ThreadPoolExecutor(WORKERS, thread_name_prefix='warmup')
+
+
+def _run(task, path, city):
+    start = time.perf_counter()
+    for _, compute in TASKS[task](path, city):
+        compute()
+    record('warmup.' + task, time.perf_counter() - start, city=city)
+
+
+def ready(task, path=DATA_URL, city=None):
+    """Whether every result of ``task`` of ``city`` is cached at its current dataset version."""
+    city = city or min(list_cities(path))
+    return all(results.is_cached(path, city, *key) for key, _ in TASKS[task](path, city))
+
+
+def warm_up(path=DATA_URL, cities=None):
+    """Queue every tab's results of ``cities``, by default the default city.
+
+    Tasks whose results are already cached, or that are queued or running
+    at the city's current dataset version, are not queued again.
+    """
+    cities = [min(list_cities(path))] if cities is None else cities
+    with _lock:
+        for city in cities:
+            version = dataset_version(path, city)
+            for task in TASKS:
+                queued = _futures.get((path, city, task))
+                if queued is not None and queued[0] == version and not queued[1].done():
+                    continue
+                if not ready(task, path, city):
+                    _futures[(path, city, task)] = (version, _executor().submit(_run, task, path, city))
+
+
+def _current(task, path, city):
+    queued = _futures.get((path, city, task))
+    if queued is not None and queued[0] == dataset_version(path, city):
+        return queued[1]
+    return None
+
+
+def warming(task, path=DATA_URL, city=None):
+    """Whether some result of ``task`` of ``city`` is not cached yet."""
+    return not ready(task, path, city)
+
+
+def wait(task, path=DATA_URL, city=None, timeout=None):
+    """Block until every result of ``task`` of ``city`` is cached.
+
+    A background task that is running is waited for; one still waiting in
+    the queue is cancelled instead, so the caller does not wait behind
+    other cities. Whatever is still missing afterwards, say because the
+    cache evicted it, is computed in the caller, which also raises the
+    task's errors.
+    """
+    city = city or min(list_cities(path))
+    future = _current(task, path, city)
+    if future is not None and not future.cancel():
+        concurrent.futures.wait([future], timeout)
+    for key, compute in TASKS[task](path, city):
+        if not results.is_cached(path, city, *key):
+            compute()
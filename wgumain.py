@@ -1,106 +1,34 @@
-import streamlit as st
-import pandas as pd
+import time
 import numpy as np
-import altair as alt
-import sqlite3
-import hashlib
-import math
-import logging
-
-############# Loading data into dataframe
-DATA_URL = ('indianapolis_temp.csv')
-
-def load_data(nrows):
-    data = pd.read_csv(DATA_URL, parse_dates = 
-        {'Date' : ['Year','Month','Day']}, keep_date_col=True, nrows=nrows)
-    lowercase = lambda x: str(x).lower()
-    data.rename(lowercase, axis='columns', inplace=True)
-    return data
-
-# Load all rows of data into the dataframe.
-data = load_data(9266)
-
-# Create new column for Seasons
-conditions = [
-    (pd.to_numeric(data['month']) >= 6) & (pd.to_numeric(data['month']) <= 8),
-    (pd.to_numeric(data['month']) >= 9) & (pd.to_numeric(data['month']) <= 11),
-    (pd.to_numeric(data['month']) >= 3) & (pd.to_numeric(data['month']) <= 5),
-    (pd.to_numeric(data['month']) >= 12) | (pd.to_numeric(data['month']) <= 2)
-]
-values = ['summer', 'fall', 'spring', 'winter']
-data['season'] = np.select(conditions, values)
-
-############# Creating Database connection
-conn = sqlite3.connect('dbdata.db')
-c = conn.cursor()
-
-############# Creating functions to query database
-
-# Create table in database if one doesn't exist
-def create_usertable():
-    c.execute('CREATE TABLE IF NOT EXISTS userstable(username TEXT, password TEXT)')
-
-# Add hashed username and password combo into database
-def add_userdata(username,password):
-    c.execute('INSERT INTO userstable(username, password) VALUES (?,?)', (hashlib.md5(str.encode(username)).hexdigest(),hashlib.md5(str.encode(password)).hexdigest()))
-    conn.commit()
-
-# Select hashed username and password from database and return if exists
-def login_user(username,password):
-    c.execute('SELECT * FROM userstable WHERE username =? AND password =?', (hashlib.md5(str.encode(username)).hexdigest(),hashlib.md5(str.encode(password)).hexdigest()))
-    dbdata = c.fetchall()
-    return dbdata
-
-# View all users in the database
-def view_all_users():
-    c.execute('SELECT * FROM userstable')
-    dbdata = c.fetchall()
-    return dbdata
-
-############# Creating log files
-# Setup function to create log file
-formatter = logging.Formatter('%(asctime)s %(levelname)s %(message)s')
-def setup_logger(name, log_file, level = logging.INFO):
-    handler = logging.FileHandler(log_file)
-    handler.setFormatter(formatter)
-
-    logger = logging.getLogger(name)
-    logger.setLevel(level)
-
-    if logger.handlers:
-        logger.handlers=[]
-
-    logger.addHandler(handler)
-
-    return logger
-    
-# Create log file
-file_logger = setup_logger('first_logger', 'invalidentries.log')
+import streamlit as st
+from weather.aggregations import MONTHS
+from weather.charts import monthly_daily_chart, prediction_chart, regression_chart
+from weather.dates import log_invalid, month_number, validate_dates
+from weather.instrument import record, recorded, reset, span
+from weather.loader import list_cities
+from weather.logs import get_file_logger
+from weather.models import DEFAULT_MODEL, LABELS
+from weather.results import (complete_years, daily_month_averages, monthly_average_spec, prediction, regression_index,
+                             seasonal_spec, year_temperatures, yearly_spec)
+from weather.session import current_user, log_in, log_out
+from weather.users import add_userdata
+from weather.warmup import wait, warm_up, warming
+
+# Data, regression index and database connection are created on first use
+file_logger = get_file_logger()
+
+# Time this rerun and collect its spans for the debug panel
+rerun_start = time.perf_counter()
+reset()
+
+# Precompute the default city's tabs in the background on startup and whenever its data changes
+with span('warmup.queue'):
+    warm_up()
 
 ############# Start of Application
 
-# Create variables for use in data
-GET_SEASONS = ['winter', 'spring', 'summer', 'fall']
-COLOR = ['#fa4115','#bb2852','#1aa6c2','#49eb6e','#0a4dca','#fbb6c0','#3ca900','#b7a1f4','#3fcdf9','#c59121','#171ba2', '#870a11']
-MONTHS = ['January', 'February', 'March', 'April', 'May', 'June', 'July', 'August', 'September', 'October', 'November', 'December']
-YEARS = []
-for x in range(1995,2020):
-    YEARS.append(int(x))
-YEARS_STRING = []
-for x in range(1995,2020):
-    YEARS_STRING.append(str(x))
-DAYS = []
-for x in range(0,31):
-    DAYS.append(str(x + 1))
-LEAP_YEARS = []
-for x in range(0,276):
-    LEAP_YEARS.append(1900 + (4*x))
-NON_LEAP_YEARS = [1900, 2100, 2200, 2300, 2500, 2600, 2700, 2900, 3000]
-for x in range(len(NON_LEAP_YEARS)):
-    LEAP_YEARS.remove(NON_LEAP_YEARS[x])
-
 # Application Title
-st.title('Indianapolis Weather Data')
+st.title('Weather Data')
 
 # Application Sidebar Selections
 menu = ['Login', 'Sign Up']
@@ -116,21 +44,40 @@ if choice == 'Login':
 
     # If user selects login checkbox
     if st.sidebar.checkbox('Login'):
-        # Create database table if non-existent
-        # Query database to check if username and password combo exists and save as boolean
-        create_usertable()
-        result = login_user(username,password)
+        # Reuse this session's login until it expires or the user changes
+        # Otherwise query database to check if username and password combo exists
+        if current_user(st.session_state) != username:
+            with span('auth.login'):
+                log_in(st.session_state, username, password)
+        result = current_user(st.session_state) == username
 
         # If username and password combo exists give access to view data
         if result:
             # Notify user of successful login
             st.success('Logged in as {}'.format(username))
 
-            # Create menus to display data
+            # Create menus to choose the city and data to display
+            # Only the selected city's partition is loaded
+            city = st.selectbox('City', list_cities())
             task = st.selectbox('Weather Data', ['Seasonal', 'Monthly', 'Yearly', 'Prediction'])
+
+            # Precompute the other tabs of the selected city in the background
+            with span('warmup.queue', city = city):
+                warm_up(cities = [city])
+
+            # Tables are computed from the city's running sums once per
+            # dataset version and shared by every session
+            # Years with a full twelve months of data
+            with span('load.years', city = city):
+                YEARS = complete_years(city = city)
             
             ############# Show data based on selected tab
-            if task == 'Seasonal':
+            # Averages need at least one year with all twelve months, which a
+            # newly ingested city does not have yet
+            if task != 'Prediction' and not YEARS:
+                st.info('{} does not have a year with all twelve months of data yet'.format(city))
+
+            elif task == 'Seasonal':
                 # USING METEOROLOGICAL SEASONS
                     # December 1 to February 28 (WINTER)
                     # March 1 to May 31 (SPRING)
@@ -139,299 +86,140 @@ if choice == 'Login':
                 # Create Bar Chart for seasonal temperatures
                 st.subheader('Temperatures by Season')
 
-                # Create slider to display data by year
-                SLIDER = alt.binding_range(min=1995, max=2019, step=1, name = 'Year')
-                SELECT_YEAR = alt.selection_single(name='Year', fields=['Year'],
-                                                bind=SLIDER, init={'Year': 2019})
-
-                # Create matrix to store temperatures by year
-                SEASONAL_DATA = []
-                for x in range(1995,2020):
-                    a=[]
-                    for y in range(0,4):
-                        a.append(0)
-                    SEASONAL_DATA.append(a)
-
-                # Populate matrix with temperature data
-                for i in range(len(SEASONAL_DATA)):
-                    for j in range(len(SEASONAL_DATA[0])):
-                        SEASONAL_DATA[i][j]=(data.loc[(data['season'] == GET_SEASONS[j]) & (data['year'] == str(i+1995)), 'avgtemperature'].sum() / data.loc[(data['season'] == GET_SEASONS[j]) & (data['year'] == str(i+1995)), 'avgtemperature'].count())
-
-                # Create dataframe
-                # Label columns by Season
-                # Create column for years
-                SEASONAL_DF = pd.DataFrame(SEASONAL_DATA)
-                SEASONAL_DF.columns = ['Winter', 'Spring', 'Summer', 'Fall']
-                SEASONAL_DF['Year'] = YEARS
-
-                # Change dataframe to long form data
-                # Add column for date range of each season
-                SEASONAL_CLEAN_DF = SEASONAL_DF.melt('Year', value_name= 'Temperature (°F)', var_name= 'Seasons')
-                SEASONAL_CLEAN_DF['Range'] = [0] * 100
-                SEASONAL_CLEAN_DF['Temperature (°F)'] = SEASONAL_CLEAN_DF['Temperature (°F)'].astype(float)
-                SEASONAL_CLEAN_DF['Temperature (°F)'] = SEASONAL_CLEAN_DF['Temperature (°F)'].round(decimals = 2)
-                SEASONAL_CLEAN_DF.loc[SEASONAL_CLEAN_DF['Seasons'] == 'Winter', 'Range'] = 'December 1 - February 28/29'
-                SEASONAL_CLEAN_DF.loc[SEASONAL_CLEAN_DF['Seasons'] == 'Spring', 'Range'] = 'March 1 - May 31'
-                SEASONAL_CLEAN_DF.loc[SEASONAL_CLEAN_DF['Seasons'] == 'Summer', 'Range'] = 'June 1 - August 31'
-                SEASONAL_CLEAN_DF.loc[SEASONAL_CLEAN_DF['Seasons'] == 'Fall', 'Range'] = 'September 1 - November 30'
-
-                # Create altair chart to display dataframe as bar graph
-                SEASON_CHART = alt.Chart(SEASONAL_CLEAN_DF).mark_bar().encode(x=alt.X('Seasons', sort = None), y = alt.Y('Temperature (°F)', scale = alt.Scale(domain = (0, 80))), color = 'Seasons', 
-                    tooltip = [alt.Tooltip('Temperature (°F)', title = 'Farenheit'), alt.Tooltip('Range', title = 'Date Range')]).add_selection(SELECT_YEAR).transform_filter(SELECT_YEAR).interactive()
-                st.altair_chart(SEASON_CHART, use_container_width=True)
+                # Show a warming indicator while the background worker finishes this tab
+                if warming('seasonal', city = city):
+                    with st.spinner('Warming up the seasonal chart...'):
+                        wait('seasonal', city = city)
+
+                # Average temperature for each season of each year
+                # Display the cached bar chart spec of the seasonal table
+                with span('seasonal.spec', city = city):
+                    SEASONAL_SPEC = seasonal_spec(city = city)
+                with span('seasonal.chart', city = city):
+                    st.vega_lite_chart(SEASONAL_SPEC, use_container_width=True)
 
             elif task == 'Monthly':
                 # Create Two Line Charts for monthly temperatures and monthly averages
                 # Create line chart for monthly
                 st.subheader('Monthly Temperatures by Day')
 
-                # Create dataframe from original data dropping not needed columns
-                # Change year to integer
-                MONTH_DATA = data.drop(columns = ['date', 'region', 'country', 'state', 'city', 'season'])
-                MONTH_DATA = MONTH_DATA.astype({'year' : 'int'})
+                # Show a warming indicator while the background worker finishes this tab
+                if warming('monthly', city = city):
+                    with st.spinner('Warming up the monthly charts...'):
+                        wait('monthly', city = city)
 
                 # Create slider to display data by year
-                SLIDER2 = alt.binding_range(min=1995, max=2019, step=1, name = 'Year')
-                SELECT_YEAR2 = alt.selection_single(name='year', fields=['year'],
-                                                bind=SLIDER2, init={'year': 2019})
-
-                # Create and populate column to hold name of month i.e "January"
-                MONTH_DATA['name'] = ['a'] * 9265
-                for x in range(13):
-                    MONTH_DATA.loc[MONTH_DATA['month'] == str(x), 'name'] = MONTHS[x - 1]
-
-                # Create selection for tooltip hover
-                selection = alt.selection_single(fields=['day'], nearest=True, on='mouseover', empty='none', clear='mouseout')
-
-                # Create chart for month line
-                # Create chart for temperature data points
-                # Create chart to display tooltip on vertical line
-                MONTH_CHART = alt.Chart(MONTH_DATA).mark_line().encode(x = alt.X('day', sort = None, title = 'Day'), y = alt.Y('avgtemperature', title = 'Temperature (°F)'), color = alt.Color('name', scale = alt.Scale(domain = MONTHS, range = COLOR), title = 'Month'))
-                MONTH_POINT = alt.Chart(MONTH_DATA).mark_circle().encode(x = alt.X('day', sort = None, title = 'Day'), y = alt.Y('avgtemperature', title = 'Temperature (°F)'), color = alt.Color('name', scale = alt.Scale(domain = MONTHS, range = COLOR), title = 'Month'), tooltip = [alt.Tooltip('avgtemperature', title = 'Farenheit')])
-                MONTH_TOOLTIP = alt.Chart(MONTH_DATA).transform_pivot('name', value='avgtemperature', groupby = ['day']).mark_rule(color = 'steelblue').encode(x = alt.X('day', sort = None, title = 'Day'), opacity = alt.condition(selection, alt.value(1), alt.value(0)), tooltip = [alt.Tooltip(c, type = 'quantitative') for c in MONTHS]).add_selection(selection)
+                # Only years with data can be chosen, as the data can skip years
+                # Only the selected year's rows are sent to the browser
+                year_selected = st.select_slider('Year', options = YEARS, value = YEARS[-1])
 
                 # Dislpay Charts as line graph
-                st.altair_chart((MONTH_CHART + MONTH_POINT + MONTH_TOOLTIP).add_selection(SELECT_YEAR2).transform_filter(SELECT_YEAR2).interactive(), use_container_width=True)
-            
-                # Create line chart for monthly averages
-                st.subheader('Average Monthly Temperatures Since 1995')
-
-                # Create matrix to hold monthly data
-                MONTH_DATA_AVG = []
-                for x in range(1,32):
-                    a=[]
-                    for y in range(1,13):
-                        a.append(0)
-                    MONTH_DATA_AVG.append(a)
-                
-                # Populate matrix with monthly temperatures
-                for i in range(len(MONTH_DATA_AVG)):
-                    for j in range(len(MONTH_DATA_AVG[0])):
-                        if (data.loc[(data['month'] == str(j+1)) & (data['day'] == str(i+1)), 'avgtemperature'].sum()) != 0 or (data.loc[(data['month'] == str(j+1)) & (data['day'] == str(i+1)), 'avgtemperature'].count()) != 0:
-                            MONTH_DATA_AVG[i][j]=(data.loc[(data['month'] == str(j+1)) & (data['day'] == str(i+1)), 'avgtemperature'].sum() / data.loc[(data['month'] == str(j+1)) & (data['day'] == str(i+1)), 'avgtemperature'].count())
-                        else:
-                            file_logger.info('The month does not have any more days')
-                            MONTH_DATA_AVG[i][j]=np.nan
-                
-                # Create dataframe
-                # Label columns by month
-                # Create column to hold day values
-                MONTH_DF_AVG = pd.DataFrame(MONTH_DATA_AVG)
-                MONTH_DF_AVG.columns = MONTHS
-                MONTH_DF_AVG['Days'] = DAYS
+                with span('monthly.load', city = city):
+                    year_data = year_temperatures(year_selected, city = city)
+                with span('monthly.daily_chart', city = city):
+                    st.altair_chart(monthly_daily_chart(year_data), use_container_width=True)
 
-                # Change dataframe to long form data
-                MONTH_DATA_AVG_CLEAN = MONTH_DF_AVG.melt('Days', value_name= 'Temperature (°F)', var_name= 'Months')
-                MONTH_DATA_AVG_CLEAN['Temperature (°F)'] = MONTH_DATA_AVG_CLEAN['Temperature (°F)'].round(decimals = 1)
-
-                # Create selection for tooltip hover
-                selection2 = alt.selection_single(fields=['Days'], nearest=True, on='mouseover', empty='none', clear='mouseout')
+                # Create line chart for monthly averages
+                st.subheader('Average Monthly Temperatures Since {}'.format(YEARS[0]))
 
-                # Create chart for month line
-                # Create chart to display tooltip on vertical line
-                MONTH_AVG_CHART = alt.Chart(MONTH_DATA_AVG_CLEAN).mark_line().encode(x = alt.X('Days', sort = None), y = alt.Y('Temperature (°F)', scale = alt.Scale(domain = (20,80))), color = alt.Color('Months', scale = alt.Scale(domain = MONTHS, range = COLOR)))
-                MONTH_AVG_RULE = alt.Chart(MONTH_DATA_AVG_CLEAN).transform_pivot('Months', value='Temperature (°F)', groupby = ['Days']).mark_rule(color = 'steelblue').encode(x = alt.X('Days', sort = None, title = 'Days'), opacity = alt.condition(selection2, alt.value(1), alt.value(0)), tooltip = [alt.Tooltip(c, type = 'quantitative') for c in MONTHS]).add_selection(selection2)
+                # Average temperature for each day of each month
+                # Log the days a month does not have
+                with span('monthly.aggregate', city = city):
+                    MONTH_DATA_AVG_CLEAN = daily_month_averages(city = city)
+                missing_days = MONTH_DATA_AVG_CLEAN['Temperature (°F)'].isna().sum()
+                if missing_days:
+                    file_logger.info('The month does not have any more days ({} empty cells)'.format(missing_days))
 
-                # Display charts as line graph
-                st.altair_chart((MONTH_AVG_CHART + MONTH_AVG_RULE).interactive(), use_container_width=True)
+                # Display the cached line chart spec of the averages
+                with span('monthly.chart', city = city):
+                    st.vega_lite_chart(monthly_average_spec(city = city), use_container_width=True)
 
             elif task == 'Yearly':
                 # Create bubble chart with trend line for yearly average temperature
                 st.subheader('Yearly Temperatures')
 
-                # Create and populate array to hold average temperature for each year
-                YEARLY_DATA = []
-                for x in range(1995,2020):
-                    YEARLY_DATA.append(data.loc[data['year'] == str(x), 'avgtemperature'].sum() / data.loc[data['year'] == str(x), 'avgtemperature'].count())
+                # Show a warming indicator while the background worker finishes this tab
+                if warming('yearly', city = city):
+                    with st.spinner('Warming up the yearly chart...'):
+                        wait('yearly', city = city)
 
-                # Create dataframe for temperature data
-                YEARLY_DF = pd.DataFrame({'Years' : YEARS_STRING, 'Temperature (°F)' : YEARLY_DATA})
+                # Average temperature for each year as a cached bubble chart spec with trend line
+                with span('yearly.spec', city = city):
+                    YEARLY_SPEC = yearly_spec(city = city)
 
-                # Create bubble chart for yearly average temperature
-                # Create trend line to show temperature change per year
-                YEARLY_CHART_BUBBLE = alt.Chart(YEARLY_DF).mark_point(color = 'red').encode(x = alt.X('Years', sort = None), y = alt.Y('Temperature (°F)', scale = alt.Scale(domain = (49,58))))
-                YEARLY_CHART_TREND = YEARLY_CHART_BUBBLE.transform_regression('Years', 'Temperature (°F)').mark_line(color = 'orange').encode()
-                
-                # Display Charts as bubble graph with trend line
-                st.altair_chart((YEARLY_CHART_BUBBLE + YEARLY_CHART_TREND).interactive(), use_container_width=True)
+                # Display bubble chart with trend line
+                with span('yearly.chart', city = city):
+                    st.vega_lite_chart(YEARLY_SPEC, use_container_width=True)
 
             elif task == 'Prediction':
                 # Create temperature prediction based on date input < 12/31/3000
                 st.subheader('Temperature Prediction')
 
+                # Show a warming indicator while the background worker finishes this tab
+                if warming('prediction', city = city):
+                    with st.spinner('Warming up the prediction models...'):
+                        wait('prediction', city = city)
+
+                # Forecasting model, fitted over every year of the city's data
+                model = st.selectbox('Model', list(LABELS), index = list(LABELS).index(DEFAULT_MODEL), format_func = LABELS.get)
+                with span('prediction.index', city = city, model = model):
+                    regression = regression_index(city = city, model = model)
+                first_year = int(regression.years[0])
+                last_year = int(regression.years[-1])
+
                 # User input fields
                 day_prediction = st.number_input('Day', min_value = 1, max_value = 31, step = 1)
                 month_prediction = st.selectbox('Month', MONTHS)
-                year_prediction = st.number_input('Year', min_value = 2021, max_value = 3000, step = 1)
-
-                # Verify user has input a correct date
-                correct_format = True
-                leap_year = False
-                short_months = {'april', 'june', 'september', 'november'}
-                month_index = -1
+                year_prediction = st.number_input('Year', min_value = last_year + 1, max_value = 3000, step = 1)
 
                 # When user presses enter check if date is entered correctly
                 if st.button('Enter'):
-                    # Check if year entered is a leap year
-                    for x in range(len(LEAP_YEARS)):
-                        if year_prediction == LEAP_YEARS[x]:
-                            leap_year = True
-                            break;
-
-                    # Check if month input has less than 31 days
-                    # Check if day input is greater that 30
-                    # Give warning message if True
-                    if month_prediction.lower() in short_months:
-                        if day_prediction == 31:
-                            file_logger.info('The month you have entered does not have 31 Days')
-                            st.warning('The month you have entered does not have 31 Days')
-                            correct_format = False
-
-                    # Check if month entered is February
-                    # Check if day selected is under 30
-                    # Check if day selected is 29 and is not a leap year
-                    # Give warning message if True
-                    if month_prediction.lower() == 'february':
-                        if day_prediction == 30 or day_prediction == 31:
-                            st.warning('The month you have enetered does not have more than 30 days')
-                            file_logger.info('The month you have enetered does not have more than 30 days')
-                            correct_format = False
-                        if day_prediction == 29 and leap_year == False:
-                            file_logger.info('This is not a leap year')
-                            st.warning('This is not a leap year')
-                            correct_format = False
+                    # Check the day exists in the month and year entered
+                    # Give warning message if not
+                    reasons = validate_dates([year_prediction], [month_prediction], [day_prediction])[3]
+                    correct_format = reasons[0] == ''
+                    if not correct_format:
+                        log_invalid(['{} {}, {}'.format(month_prediction, day_prediction, year_prediction)], reasons)
+                        st.warning(reasons[0][0].upper() + reasons[0][1:])
 
                     # Set month index to months #
-                    for x in range(len(MONTHS)):
-                        if MONTHS[x] == month_prediction:
-                            month_index = x + 1
-                            break;
+                    month_index = month_number(month_prediction)
 
                     # If data entered is in correct format predict temperature data
                     if correct_format:
-                        # Create list of what years have temperature data of given date
-                        temperature_years = []
-                        for x in range(1995, 2021):
-                            if data.loc[(data['month'] == str(month_index)) & (data['day'] == str(day_prediction)) & (data['year'] == str(x)), 'avgtemperature'].any():
-                                temperature_years.append(str(x))
-                        
+                        # Look up the fitted regression line for the given date
                         # Get temperature data for all previous years of given date
-                        temperature_data = []
-                        if data.loc[(data['month'] == str(month_index)) & (data['day'] == str(day_prediction)), 'avgtemperature'].any():
-                                temperature_data.append(data.loc[(data['month'] == str(month_index)) & (data['day'] == str(day_prediction)), 'avgtemperature'])
-                        
-                        # Create dataframe and transform rows and columns
-                        # Add year column
-                        temperature_df = pd.DataFrame(temperature_data)
-                        temperature_df.columns = temperature_years
-                        temperature_clean_df = temperature_df.T
-                        temperature_clean_df['Year'] = temperature_years
-                        
-                        # Create X variables for regression equation
-                        temperature_clean_df.Year = temperature_clean_df.Year.astype(int)
-                        total_year = (temperature_clean_df['Year']).sum()
-                        mean_year = (int(total_year) / len(temperature_clean_df['Year']))
-
-                        year_difference = []
-                        for x in range(len(temperature_years)):
-                            year_difference.append(int(temperature_years[x]) - mean_year)
-
-                        sum_of_squares = 0
-                        for x in range(len(year_difference)):
-                            sum_of_squares = (sum_of_squares + (year_difference[x] * year_difference[x]))
-
-                        # Create Y variables for regression equation
-                        total_temp = temperature_clean_df['avgtemperature'].sum()
-                        mean_temp = (total_temp / len(temperature_clean_df['avgtemperature']))
-
-                        temp_difference = []
-                        for x in range(len(temperature_clean_df['avgtemperature'])):
-                            temp_difference.append(((temperature_clean_df['avgtemperature']).iloc[x]) - mean_temp)
-
-                        sum_of_products = 0
-                        for x in range(len(temp_difference)):
-                            sum_of_products = (sum_of_products + (temp_difference[x] * year_difference[x]))
-                        
+                        with span('prediction.lookup', city = city):
+                            predicted = prediction(month_index, day_prediction, year_prediction, city = city, model = model)
+                        fit = predicted.fit
+                        temperature_clean_df = predicted.observations
+
+                    # A model without enough years of the date has no line for it
+                    if correct_format and np.isnan(fit.slope):
+                        st.info('{} has too few years of data for {} {} to fit this model yet'.format(city, month_prediction, day_prediction))
+                    elif correct_format:
                         # Create regression equation
-                        b = (sum_of_products / sum_of_squares)
-                        a = (mean_temp - (b * mean_year))
-                        regression_equation = ((b * year_prediction) + a)
-
-                        # Get standard deviation of temperatures
-                        # Create array to hold predicted and actual data
-                        y_actual = []
-                        y_predicted = []
-
-                        # Populate arrays with predicted and actual data
-                        for x in range(len(temperature_clean_df['avgtemperature'])):
-                            y_actual.append(((temperature_clean_df['avgtemperature']).iloc[x]))
-                        for x in range(len(temperature_years)):
-                            y_predicted.append((b * 1995) + a)
-                        
-                        # Find means square error and root mean square error
-                        MSE = np.square(np.subtract(y_actual,y_predicted)).mean() 
-                        RMSE = math.sqrt(MSE)
-
-                        # Create variables to use for regression line
-                        x_variables = [1995, 2020]
-                        y_variables = [((b * 1995) + a), ((b * 2020) + a)]
-
-                        # Create selection for tooltip hover
-                        selection3 = alt.selection_single(fields=['Year'], nearest=True, on='mouseover', empty='none', clear='mouseout')
-
-                        # Create dataframe for regression line
-                        regression_line_df = pd.DataFrame({'Years' : x_variables, 'Temperature' : y_variables})
-
-                        # Create charts to display bubble chart and regression line
-                        # Create chart for regression line
-                        # Create chart for data points
-                        # Create chart for vertical tooltip
-                        regression_line = alt.Chart(regression_line_df).mark_line(color = 'red').encode(x = alt.X('Years', sort = None, scale = alt.Scale(domain = (1995, 2020))), y = alt.Y('Temperature'))
-                        data_points = alt.Chart(temperature_clean_df).mark_point().encode(x = alt.X('Year', sort = None, scale = alt.Scale(domain = (1995, 2020))), y = alt.Y('avgtemperature', title = 'Temperature'))
-                        regression_rule = alt.Chart(temperature_clean_df).mark_rule(color = 'steelblue').encode(x = alt.X('Year', sort = None, scale = alt.Scale(domain = (1995, 2020))), opacity = alt.condition(selection3, alt.value(1), alt.value(0)),tooltip = alt.Tooltip('avgtemperature')).add_selection(selection3)
+                        regression_equation = predicted.temperature
 
                         # Display bubble chart and regression line
-                        st.altair_chart((data_points + regression_line + regression_rule).properties(width = 600).interactive())
+                        with span('prediction.chart', city = city):
+                            st.altair_chart(regression_chart(temperature_clean_df, fit, first_year, last_year))
 
-                        # Create variables for regression line prediction
-                        y_variables2 = [((b * 1995) + a), regression_equation]
-                        x_variables2 = [1995, year_prediction]
-
-                        # Create dataframe and chart for regression line prediction
-                        regression_line_df2 = pd.DataFrame({'Years' : x_variables2, 'Temperature' : y_variables2})
-                        regression_line2 = alt.Chart(regression_line_df2).mark_line(color = 'red').encode(x = alt.X('Years', sort = None, scale = alt.Scale(domain = (1995, year_prediction))), y = alt.Y('Temperature')).properties(width = (1250))
-                        
                         # Display predicted temperature for given date
-                        st.write('The predicted temperature for ', month_prediction, ' ', str(day_prediction), ', ', str(year_prediction), ' is: ', str(regression_equation.round(decimals = 2)), '+/-', str(round(RMSE, 2)), '°F')
+                        st.write('The predicted temperature for ', month_prediction, ' ', str(day_prediction), ', ', str(year_prediction), ' is: ', str(round(regression_equation, 2)), '+/-', str(round(fit.rmse, 2)), '°F')
 
                         # Display regression line prediction
-                        st.altair_chart(regression_line2)
+                        st.altair_chart(prediction_chart(fit, first_year, year_prediction))
                 
         # If username and password combo does not exist give error message
         else:
             st.warning('Incorrect Username/Password')
             file_logger.info('Incorrect Username/Password')
 
+    # Unticking the login checkbox logs the user out
+    else:
+        log_out(st.session_state)
+
 # If the user chooses the Sign Up menu in sidebar
 elif choice == 'Sign Up':
     # Tell user to sign up
@@ -442,11 +230,15 @@ elif choice == 'Sign Up':
 
     # When user presses sign up button
     if st.button('Sign Up'):
-        # Create user table in database if non-existent
         # Add user data to table
-        # Display success to user
-        create_usertable()
-        add_userdata(new_user, new_password)
-        st.success('Account Successfully Created')
-        st.info('Navigate to login menu to proceed')
+        # Display success to user, or a warning if the username is taken
+        if add_userdata(new_user, new_password):
+            st.success('Account Successfully Created')
+            st.info('Navigate to login menu to proceed')
+        else:
+            st.warning('Username already taken')
 
+############# Timings of this rerun
+record('rerun', time.perf_counter() - rerun_start)
+if st.sidebar.checkbox('Show timings'):
+    st.sidebar.table(recorded())